@@ -1,6 +1,60 @@
 from django.contrib import admin
+from django.db import connections, transaction
+from django.db.models import Q
 
-from .models import Category, Comment, Idea, UserProfile, Vote
+from .models import Category, Comment, Idea, IdeaStatusChange, Task, UserProfile, Vote
+from .pagination import EstimatedCountPaginator
+from .rollups import defer, move_changes
+from .search import get_search_backend
+
+# Sorts after every string a search term can be a prefix of.
+PREFIX_END = '\U0010ffff'
+
+
+def prefix_match(model, path, term, vendor):
+    """Q matching rows whose ``path`` starts with ``term``, using an index.
+
+    ``icontains`` can't use an index. PostgreSQL gets ``LIKE 'term%'``,
+    served by a ``varchar_pattern_ops`` index (Django adds one for indexed
+    and unique CharFields); a range would be wrong under linguistic
+    collations. SQLite's LIKE is case-insensitive and skips indexes, but it
+    compares bytes, so there the prefix becomes a range. ``relation__field``
+    becomes ``relation IN (SELECT ...)``, which uses the index on the
+    related field and then the foreign key's.
+    """
+    relation, _, field = path.rpartition('__')
+    if vendor == 'sqlite':
+        condition = Q(**{f'{field}__gte': term, f'{field}__lt': term + PREFIX_END})
+    else:
+        condition = Q(**{f'{field}__startswith': term})
+    if not relation:
+        return condition
+    related = model._meta.get_field(relation).related_model
+    return Q(**{f'{relation}__in': related._default_manager.filter(condition).values('pk')})
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Changelist settings for tables with millions of rows.
+
+    Counts are estimated (and never run twice), list pages sort by primary
+    key, and ``search_fields`` are matched by case-sensitive prefix using
+    the fields' indexes.
+    """
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    ordering = ('-pk',)
+    search_help_text = 'Case-sensitive prefix of a title or username.'
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        vendor = connections[queryset.db].vendor
+        condition = Q()
+        for path in self.search_fields:
+            condition |= prefix_match(self.model, path, term, vendor)
+        return queryset.filter(condition), False
 
 
 @admin.register(Category)
@@ -9,30 +63,95 @@ class CategoryAdmin(admin.ModelAdmin):
     search_fields = ('name',)
 
 
+def status_action(status, label):
+    """Admin action moving the selected ideas to ``status`` in one UPDATE."""
+
+    @admin.action(description=f'Mark selected ideas as {label.lower()}', permissions=['change'])
+    def action(modeladmin, request, queryset):
+        changed = queryset.set_status(status, changed_by=request.user)
+        modeladmin.message_user(request, f'{changed} idea(s) marked as {label.lower()}.')
+
+    action.__name__ = f'mark_{status}'
+    return action
+
+
 @admin.register(Idea)
-class IdeaAdmin(admin.ModelAdmin):
+class IdeaAdmin(LargeTableAdmin):
     list_display = ('title', 'category', 'submitter', 'status', 'submission_date')
     list_filter = ('status', 'category')
-    search_fields = ('title', 'description', 'submitter__username')
+    list_select_related = ('category', 'submitter')
+    search_fields = ('submitter__username',)
+    search_help_text = 'Words in the title or description, or the start of a username.'
     autocomplete_fields = ('category', 'submitter')
+    actions = [status_action(status, label) for status, label in Idea.STATUS_CHOICES]
+    # Newest first, on the same index as the home feed.
+    ordering = ('-submission_date', '-id')
+    # Counters are kept by votes and comments, and status changes go through
+    # the actions so they are recorded and counted in the rollups.
+    readonly_fields = (
+        'status', 'upvotes', 'downvotes', 'score', 'comment_total', 'hot_score', 'updated_at',
+    )
+
+    def save_model(self, request, obj, form, change):
+        if not change:
+            return super().save_model(request, obj, form, change)
+        # Write only the form's fields, not counters loaded before a vote.
+        with transaction.atomic():
+            obj.save(update_fields=[*form.fields, 'updated_at'])
+            if 'category' in form.changed_data:
+                defer(move_changes(obj, form.initial['category']))
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        # The feed's full-text index instead of LIKE '%term%' on every row.
+        # Its SQL names ideas_idea directly, so it can't go in a subquery.
+        vendor = connections[queryset.db].vendor
+        by_submitter = queryset.filter(prefix_match(Idea, 'submitter__username', term, vendor))
+        return by_submitter | get_search_backend(queryset.db).search(queryset, term), False
+
+
+@admin.register(IdeaStatusChange)
+class IdeaStatusChangeAdmin(LargeTableAdmin):
+    list_display = ('idea', 'old_status', 'new_status', 'changed_by', 'changed_at')
+    list_filter = ('new_status',)
+    list_select_related = ('idea', 'changed_by')
+    search_fields = ('idea__title', 'changed_by__username')
+    raw_id_fields = ('idea', 'changed_by')
 
 
 @admin.register(Vote)
-class VoteAdmin(admin.ModelAdmin):
+class VoteAdmin(LargeTableAdmin):
     list_display = ('idea', 'user', 'vote_type', 'voted_at')
     list_filter = ('vote_type',)
+    list_select_related = ('idea', 'user')
     search_fields = ('idea__title', 'user__username')
+    raw_id_fields = ('idea', 'user')
 
 
 @admin.register(Comment)
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(LargeTableAdmin):
     list_display = ('idea', 'user', 'timestamp', 'parent_comment')
-    search_fields = ('idea__title', 'user__username', 'content')
+    # Comment.__str__ reads the parent's user and idea too.
+    list_select_related = ('idea', 'user', 'parent_comment__idea', 'parent_comment__user')
+    search_fields = ('idea__title', 'user__username')
     autocomplete_fields = ('idea', 'user', 'parent_comment')
 
 
 @admin.register(UserProfile)
-class UserProfileAdmin(admin.ModelAdmin):
+class UserProfileAdmin(LargeTableAdmin):
     list_display = ('user', 'role')
     list_filter = ('role',)
-    search_fields = ('user__username', 'user__email')
+    list_select_related = ('user',)
+    search_fields = ('user__username',)
+    search_help_text = 'Case-sensitive prefix of a username.'
+    raw_id_fields = ('user',)
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'attempts', 'failed', 'run_after', 'locked_until')
+    list_filter = ('failed', 'name')
+    ordering = ('run_after', 'id')
+    readonly_fields = ('created_at', 'claim', 'last_error')
@@ -1,4 +1,13 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+def ensure_search_index(sender, using, **kwargs):
+    # Table rebuilds in later SQLite migrations drop the FTS triggers; put
+    # them back so the index keeps tracking ideas.
+    from .search import get_search_backend
+
+    get_search_backend(using).install()
 
 
 class IdeasConfig(AppConfig):
@@ -6,4 +15,6 @@ class IdeasConfig(AppConfig):
     name = 'ideas'
 
     def ready(self):
-        from . import signals  # noqa: F401
\ No newline at end of file
+        from . import signals  # noqa: F401
+
+        post_migrate.connect(ensure_search_index, sender=self)
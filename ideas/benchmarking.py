@@ -0,0 +1,95 @@
+"""Helpers shared by the ``benchmark_*`` management commands."""
+
+import contextlib
+import itertools
+import statistics
+import time
+
+from django.db import DEFAULT_DB_ALIAS, connections
+
+WORDS = (
+    'automation analytics budget campus cloud community cost customer dashboard data '
+    'delivery digital energy engagement feedback green hiring inventory learning '
+    'logistics mentoring mobile onboarding packaging platform portal process quality '
+    'recycling remote reporting safety scheduling security solar student supplier '
+    'sustainability training transport waste wellbeing workflow'
+).split()
+SYLLABLES = 'ba be bi bo da de di do ka ke ki ko la le li lo ma me mi mo na ne ni no ra re ri ro sa se si so ta te ti to'.split()
+
+
+def zipf_cum_weights(n, exponent=1.0):
+    """Cumulative weights for ``random.choices`` giving rank ``r`` weight ``1 / r**exponent``."""
+    return list(itertools.accumulate(1 / rank**exponent for rank in range(1, n + 1)))
+
+
+class TextGenerator:
+    """Random text whose word frequencies follow a Zipf distribution.
+
+    The real ``WORDS`` are the most frequent terms; the long tail is made of
+    pronounceable pseudo-words so selective searches behave like real ones.
+    """
+
+    def __init__(self, rng, vocabulary_size=5000):
+        self.rng = rng
+        words = list(WORDS)
+        seen = set(words)
+        while len(words) < vocabulary_size:
+            word = ''.join(rng.choices(SYLLABLES, k=rng.randint(2, 4)))
+            if word not in seen:
+                seen.add(word)
+                words.append(word)
+        self.words = words
+        self.weights = zipf_cum_weights(len(words))
+
+    def sentence(self, length):
+        return ' '.join(self.rng.choices(self.words, cum_weights=self.weights, k=length))
+
+
+@contextlib.contextmanager
+def isolated_database(alias=DEFAULT_DB_ALIAS, name=None):
+    """Run the block against a freshly migrated throwaway copy of ``alias``.
+
+    ``name`` overrides the test database name, e.g. a file path so SQLite
+    benchmarks that use several threads share one on-disk database.
+    """
+    connection = connections[alias]
+    old_name = connection.settings_dict['NAME']
+    old_test_name = connection.settings_dict['TEST'].get('NAME')
+    if name is not None:
+        connection.settings_dict['TEST']['NAME'] = name
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        connection.settings_dict['TEST']['NAME'] = old_test_name
+
+
+def measure(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def summarize(samples):
+    """Return mean and p50/p95/p99 of ``samples`` (seconds) in milliseconds."""
+    if len(samples) < 2:
+        samples = list(samples) * 2
+    cuts = statistics.quantiles(samples, n=100, method='inclusive')
+    return {
+        'n': len(samples),
+        'mean': statistics.fmean(samples) * 1000,
+        'p50': cuts[49] * 1000,
+        'p95': cuts[94] * 1000,
+        'p99': cuts[98] * 1000,
+    }
+
+
+def format_summary(label, summary, width=28):
+    return (
+        f"{label:<{width}} n={summary['n']:<6} mean={summary['mean']:8.2f}ms "
+        f"p50={summary['p50']:8.2f}ms p95={summary['p95']:8.2f}ms p99={summary['p99']:8.2f}ms"
+    )
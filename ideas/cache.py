@@ -0,0 +1,73 @@
+import functools
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+FEED_GENERATION_KEY = 'ideas:feed-generation'
+
+
+def feed_generation():
+    """Token that changes whenever any idea, vote, comment or category changes."""
+    generation = cache.get(FEED_GENERATION_KEY)
+    if generation is None:
+        cache.add(FEED_GENERATION_KEY, uuid.uuid4().hex, None)
+        generation = cache.get(FEED_GENERATION_KEY)
+    return generation
+
+
+def bump_feed_generation():
+    """Invalidate every cached page once the current transaction commits.
+
+    Bumping earlier would let a concurrent request cache pre-commit data
+    under the new generation.
+    """
+    transaction.on_commit(
+        lambda: cache.set(FEED_GENERATION_KEY, uuid.uuid4().hex, None)
+    )
+
+
+def touch_ideas(queryset):
+    """Give ideas a new ``updated_at`` so fragments cached for them are skipped."""
+    queryset.update(updated_at=timezone.now())
+    bump_feed_generation()
+
+
+def has_pending_messages(request):
+    if CookieStorage.cookie_name in request.COOKIES:
+        return True
+    session = getattr(request, 'session', None)
+    if session is None or session.session_key is None:
+        return False
+    return '_messages' in session
+
+
+def cache_anonymous_page(view):
+    """Serve anonymous GETs from the cache until anything in the feed changes.
+
+    Pages are keyed by the feed generation, so every write invalidates them
+    at once without tracking which pages an idea appears on.
+    """
+
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if (
+            request.method not in ('GET', 'HEAD')
+            or request.user.is_authenticated
+            or has_pending_messages(request)
+        ):
+            return view(request, *args, **kwargs)
+        path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+        key = f'ideas:page:{feed_generation()}:{path}'
+        response = cache.get(key)
+        if response is None:
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200 and not response.streaming and not response.cookies:
+                cache.set(key, response, getattr(settings, 'IDEAS_PAGE_CACHE_TIMEOUT', 300))
+        return response
+
+    return wrapper
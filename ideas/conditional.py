@@ -0,0 +1,83 @@
+"""ETags for pages, so a client with an unchanged copy gets 304 Not Modified.
+
+A tag is built from a cheap version token for the page's data (the feed
+generation, an idea's ``updated_at``) plus everything else the page shows
+that varies per request: the user and role (nav links, the user's vote) and
+the CSRF secret behind the page's tokens. Checking it costs a cache read or
+one indexed query instead of the page's queries and template.
+"""
+
+import functools
+import hashlib
+
+from django.http import HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags, quote_etag
+
+from .cache import has_pending_messages
+from .roles import get_role
+
+
+def page_etag(request, version):
+    """Quoted ETag for this request's rendering of a page built from ``version``.
+
+    Returns None, which skips conditional handling, when the version is
+    unknown or flash messages are waiting to be shown.
+    """
+    if version is None or has_pending_messages(request):
+        return None
+    role = get_role(request)
+    parts = [
+        version,
+        request.get_full_path(),
+        request.user.pk,
+        role.name,
+        role.can_review,
+        request.META.get('CSRF_COOKIE', ''),
+    ]
+    return quote_etag(hashlib.md5(repr(parts).encode()).hexdigest())
+
+
+def set_page_etag(request, response, version):
+    """Tag ``response`` as rendered from ``version`` and have clients revalidate it."""
+    _tag(request, response, page_etag(request, version))
+
+
+def _tag(request, response, etag):
+    if etag is None:
+        return
+    response.headers['ETag'] = etag
+    patch_cache_control(response, no_cache=True, private=request.user.is_authenticated)
+
+
+def conditional_page(get_version):
+    """Answer GETs for an unchanged page with 304 Not Modified, before running the view.
+
+    ``get_version(request, *args, **kwargs)`` returns a cheap version token
+    for the page's data, or None. It's called for requests carrying
+    If-None-Match and to tag responses the view didn't tag itself; views that
+    already have the version at hand can call ``set_page_etag`` to save it.
+    """
+
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            if_none_match = request.headers.get('If-None-Match')
+            if if_none_match:
+                etag = page_etag(request, get_version(request, *args, **kwargs))
+                # Weak comparison: compression middleware marks tags weak.
+                known = {tag.removeprefix('W/') for tag in parse_etags(if_none_match)}
+                if etag and (etag in known or '*' in known):
+                    response = HttpResponseNotModified()
+                    _tag(request, response, etag)
+                    return response
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200 and not response.has_header('ETag'):
+                set_page_etag(request, response, get_version(request, *args, **kwargs))
+            return response
+
+        return wrapper
+
+    return decorator
@@ -107,3 +107,11 @@ class IdeaStatusForm(forms.ModelForm):
         super().__init__(*args, **kwargs)
         self.fields['status'].widget.attrs.setdefault('class', 'form-select')
 
+
+class BulkIdeaStatusForm(forms.Form):
+    ideas = forms.ModelMultipleChoiceField(queryset=Idea.objects.all())
+    status = forms.ChoiceField(choices=Idea.STATUS_CHOICES)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['status'].widget.attrs.setdefault('class', 'form-select')
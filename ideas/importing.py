@@ -0,0 +1,219 @@
+"""Batched, idempotent imports of categories, users and ideas from CSV or JSON Lines.
+
+Each importer turns one batch of records into model instances and upserts
+them with a single ``bulk_create(..., update_conflicts=True)`` on the
+record's natural key (category name, username, idea ``external_id``), so
+re-running an import updates rows instead of duplicating them. Records
+that can't be imported are reported and skipped.
+
+``bulk_create`` sends no signals, so ``import_data`` rebuilds the rollups
+and invalidates the feed cache once at the end. Status changes made by an
+import are not audited.
+"""
+
+import csv
+import json
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Category, Idea, UserProfile, hot_score
+from .roles import invalidate_role
+
+FORMATS = ('csv', 'jsonl')
+# Records per upsert and per transaction.
+BATCH_SIZE = 2000
+
+
+class ImportRowError(ValueError):
+    """A record that can't be imported."""
+
+
+def file_format(path):
+    return 'jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv'
+
+
+def read_records(path, record_format=None):
+    """Yield the records of ``path`` as dicts, one line at a time."""
+    record_format = record_format or file_format(path)
+    with open(path, newline='', encoding='utf-8') as records:
+        if record_format == 'csv':
+            yield from csv.DictReader(records)
+            return
+        for line in records:
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as exc:
+                raise ImportRowError(f'invalid JSON: {exc}') from None
+
+
+def _text(record, field, required=False):
+    value = record.get(field)
+    value = '' if value is None else str(value).strip()
+    if required and not value:
+        raise ImportRowError(f'{field} is required')
+    return value
+
+
+def _datetime(record, field):
+    value = _text(record, field)
+    if not value:
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ImportRowError(f'{field} is not a date and time: {value!r}')
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def _choice(record, field, choices, default):
+    value = _text(record, field) or default
+    if value not in dict(choices):
+        raise ImportRowError(f'{field} must be one of {", ".join(dict(choices))}: {value!r}')
+    return value
+
+
+def _convert(numbered_records, convert):
+    """``(objects, errors)`` for ``(number, record)`` pairs; later duplicates win."""
+    objects, errors = {}, []
+    for number, record in numbered_records:
+        try:
+            key, obj = convert(record)
+        except ImportRowError as exc:
+            errors.append((number, str(exc)))
+            continue
+        objects.pop(key, None)
+        objects[key] = obj
+    return list(objects.values()), errors
+
+
+def import_categories(numbered_records):
+    """Upsert categories by name. Returns ``(imported, errors)``."""
+
+    def convert(record):
+        name = _text(record, 'name', required=True)
+        return name, Category(name=name, description=_text(record, 'description'))
+
+    categories, errors = _convert(numbered_records, convert)
+    Category.objects.bulk_create(
+        categories, update_conflicts=True, unique_fields=['name'], update_fields=['description']
+    )
+    return len(categories), errors
+
+
+def import_users(numbered_records):
+    """Upsert users by username, with their role if the record has one.
+
+    New users get an unusable password; existing passwords are kept.
+    Returns ``(imported, errors)``.
+    """
+    roles = {}
+
+    def convert(record):
+        username = _text(record, 'username', required=True)
+        role = _text(record, 'role') and _choice(record, 'role', UserProfile.ROLE_CHOICES, None)
+        user = User(
+            username=username,
+            email=_text(record, 'email'),
+            first_name=_text(record, 'first_name'),
+            last_name=_text(record, 'last_name'),
+            date_joined=_datetime(record, 'date_joined') or timezone.now(),
+            password=make_password(None),
+        )
+        if role:
+            roles[username] = role
+        return username, user
+
+    users, errors = _convert(numbered_records, convert)
+    User.objects.bulk_create(
+        users,
+        update_conflicts=True,
+        unique_fields=['username'],
+        update_fields=['email', 'first_name', 'last_name'],
+    )
+    user_ids = dict(
+        User.objects.filter(username__in=[user.username for user in users]).values_list('username', 'pk')
+    )
+    # Profiles of users without a role are created but never downgraded.
+    UserProfile.objects.bulk_create(
+        [UserProfile(user_id=user_ids[user.username]) for user in users if user.username not in roles],
+        ignore_conflicts=True,
+    )
+    UserProfile.objects.bulk_create(
+        [UserProfile(user_id=user_ids[username], role=role) for username, role in roles.items()],
+        update_conflicts=True,
+        unique_fields=['user'],
+        update_fields=['role'],
+    )
+    for username in roles:
+        invalidate_role(user_ids[username])
+    return len(users), errors
+
+
+def import_ideas(numbered_records):
+    """Upsert ideas by ``external_id``, naming their category and submitter.
+
+    Categories and submitters must already exist. Returns ``(imported, errors)``.
+    """
+    numbered_records = list(numbered_records)
+    usernames = {_text(record, 'submitter') for _, record in numbered_records}
+    submitters = dict(User.objects.filter(username__in=usernames).values_list('username', 'pk'))
+    category_names = {_text(record, 'category') for _, record in numbered_records} - {''}
+    categories = dict(Category.objects.filter(name__in=category_names).values_list('name', 'pk'))
+    now = timezone.now()
+
+    def convert(record):
+        external_id = _text(record, 'external_id', required=True)
+        submitter = _text(record, 'submitter', required=True)
+        if submitter not in submitters:
+            raise ImportRowError(f'unknown submitter {submitter!r}')
+        category = _text(record, 'category')
+        if category and category not in categories:
+            raise ImportRowError(f'unknown category {category!r}')
+        submission_date = _datetime(record, 'submission_date') or now
+        idea = Idea(
+            external_id=external_id,
+            title=_text(record, 'title', required=True)[:200],
+            description=_text(record, 'description'),
+            category_id=categories.get(category),
+            submitter_id=submitters[submitter],
+            submission_date=submission_date,
+            status=_choice(record, 'status', Idea.STATUS_CHOICES, 'pending'),
+            updated_at=now,
+            # Right for new ideas and unvoted ones; the rest are refreshed below.
+            hot_score=hot_score(0, submission_date),
+        )
+        return external_id, idea
+
+    ideas, errors = _convert(numbered_records, convert)
+    Idea.objects.bulk_create(
+        ideas,
+        update_conflicts=True,
+        unique_fields=['external_id'],
+        update_fields=[
+            'title',
+            'description',
+            'category',
+            'submitter',
+            'submission_date',
+            'status',
+            'updated_at',
+            'hot_score',
+        ],
+    )
+    Idea.objects.filter(external_id__in=[idea.external_id for idea in ideas]).exclude(
+        score=0
+    ).refresh_hot_scores()
+    return len(ideas), errors
+
+
+IMPORTERS = {
+    'categories': import_categories,
+    'users': import_users,
+    'ideas': import_ideas,
+}
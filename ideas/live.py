@@ -0,0 +1,323 @@
+"""Live idea updates pushed to open idea pages as server-sent events.
+
+Writes publish small events for an idea (its new vote totals, a new
+comment) once their transaction commits, and every event stream open on
+that idea receives them. Streams need the ASGI application
+(``innovation_project.asgi``), which serves them with
+:class:`EventStreamApplication`; a WSGI worker would hold a thread for each.
+
+Each stream keeps at most ``IDEAS_LIVE_QUEUE_SIZE`` unsent events. Vote
+events carry totals, so a newer one replaces an unsent one; past the
+limit the oldest events are dropped and the page is told it missed some.
+An idle stream is one small :class:`Subscription` waiting on an
+``asyncio.Event``, and a process serves at most ``IDEAS_LIVE_MAX_STREAMS``.
+
+The broker that carries events is pluggable through ``IDEAS_LIVE_BROKER``.
+:class:`LocalBroker` only reaches streams in the publishing process;
+:class:`RedisBroker` relays events between worker processes through Redis
+pub/sub, with one Redis connection per worker.
+"""
+
+import asyncio
+import collections
+import functools
+import io
+import json
+import logging
+import threading
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import DisallowedHost, ImproperlyConfigured
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, transaction
+from django.urls import Resolver404, resolve
+from django.utils.module_loading import import_string
+
+from .models import Idea
+
+logger = logging.getLogger(__name__)
+
+Event = collections.namedtuple('Event', ['name', 'data'])
+
+# Events whose data replaces that of an unsent event of the same name.
+COALESCED_EVENTS = {'votes'}
+# Sent when a stream dropped events, so the page can offer to reload.
+MISSED = Event('missed', {})
+
+
+class TooManyStreams(Exception):
+    """The process already serves ``IDEAS_LIVE_MAX_STREAMS`` event streams."""
+
+
+def idea_channel(idea_id):
+    return f'idea:{idea_id}'
+
+
+class Subscription:
+    """Events waiting to be sent on one stream; lives on the stream's event loop."""
+
+    __slots__ = ('channel', 'loop', 'pending', 'ready', 'missed')
+
+    def __init__(self, channel, queue_size):
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.pending = collections.deque(maxlen=queue_size)
+        self.ready = asyncio.Event()
+        self.missed = False
+
+    def put(self, event):
+        if event.name in COALESCED_EVENTS:
+            for queued in self.pending:
+                if queued.name == event.name:
+                    self.pending.remove(queued)
+                    break
+        if len(self.pending) == self.pending.maxlen:
+            self.missed = True
+        self.pending.append(event)
+        self.ready.set()
+
+    async def get(self, timeout):
+        """Return the pending events, waiting up to ``timeout`` seconds for one."""
+        if not self.pending:
+            self.ready.clear()
+            try:
+                await asyncio.wait_for(self.ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return []
+        events = list(self.pending)
+        self.pending.clear()
+        if self.missed:
+            self.missed = False
+            events.insert(0, MISSED)
+        return events
+
+
+class LocalBroker:
+    """Deliver events to the streams served by this process."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscriptions = collections.defaultdict(set)
+        self.count = 0
+
+    def subscribe(self, channel):
+        """Return a :class:`Subscription` to ``channel`` for the running event loop."""
+        subscription = Subscription(channel, settings.IDEAS_LIVE_QUEUE_SIZE)
+        with self.lock:
+            if self.count >= settings.IDEAS_LIVE_MAX_STREAMS:
+                raise TooManyStreams
+            self.count += 1
+            self.subscriptions[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            subscriptions = self.subscriptions.get(subscription.channel)
+            if subscriptions is None or subscription not in subscriptions:
+                return
+            self.count -= 1
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self.subscriptions[subscription.channel]
+
+    def publish(self, channel, event):
+        """Send ``event`` to every subscriber of ``channel``; callable from any thread."""
+        self.deliver(channel, event)
+
+    def deliver(self, channel, event):
+        with self.lock:
+            subscriptions = list(self.subscriptions.get(channel, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.put, event)
+            except RuntimeError:  # the stream's loop has closed
+                self.unsubscribe(subscription)
+
+
+class RedisBroker(LocalBroker):
+    """Share events between worker processes through Redis pub/sub.
+
+    Each process subscribes once, with a pattern covering every channel,
+    and hands what it receives to its local streams. Needs the ``redis``
+    package and ``IDEAS_LIVE_REDIS_URL``.
+    """
+
+    prefix = 'ideas:live:'
+    # Seconds to wait before resubscribing after losing Redis.
+    retry_delay = 1
+
+    def __init__(self, url=None):
+        try:
+            import redis
+            import redis.asyncio
+        except ImportError:
+            raise ImproperlyConfigured('RedisBroker needs the redis package: pip install redis')
+        super().__init__()
+        self.redis = redis
+        self.url = url or settings.IDEAS_LIVE_REDIS_URL
+        if not self.url:
+            raise ImproperlyConfigured('RedisBroker needs IDEAS_LIVE_REDIS_URL.')
+        self.client = redis.Redis.from_url(self.url)
+        self.listeners = {}
+
+    def subscribe(self, channel):
+        subscription = super().subscribe(channel)
+        listener = self.listeners.get(subscription.loop)
+        if listener is None or listener.done():
+            self.listeners[subscription.loop] = subscription.loop.create_task(self.listen())
+        return subscription
+
+    def publish(self, channel, event):
+        # Live updates are a nicety; a Redis outage mustn't fail the write.
+        try:
+            self.client.publish(self.prefix + channel, json.dumps(event, cls=DjangoJSONEncoder))
+        except self.redis.RedisError:
+            logger.warning('Could not publish a live update.', exc_info=True)
+
+    async def listen(self):
+        while True:
+            try:
+                client = self.redis.asyncio.Redis.from_url(self.url)
+                async with client.pubsub() as pubsub:
+                    await pubsub.psubscribe(self.prefix + '*')
+                    async for message in pubsub.listen():
+                        if message['type'] == 'pmessage':
+                            channel = message['channel'].decode().removeprefix(self.prefix)
+                            self.deliver(channel, Event(*json.loads(message['data'])))
+            except self.redis.RedisError:
+                logger.warning('Lost the live update broker; resubscribing.', exc_info=True)
+                await asyncio.sleep(self.retry_delay)
+
+
+@functools.cache
+def get_broker():
+    return import_string(settings.IDEAS_LIVE_BROKER)()
+
+
+def publish(idea_id, name, data, using=None):
+    """Send an event to the idea's streams once the current transaction commits."""
+    event = Event(name, data)
+    transaction.on_commit(lambda: get_broker().publish(idea_channel(idea_id), event), using=using)
+
+
+def publish_votes(idea_id, upvotes, downvotes, score, using=None):
+    publish(idea_id, 'votes', {'upvotes': upvotes, 'downvotes': downvotes, 'score': score}, using)
+
+
+def publish_comment(comment, using=None):
+    data = {
+        'id': comment.pk,
+        'parent_id': comment.parent_comment_id,
+        'user': comment.user.username,
+        'content': comment.content,
+        'timestamp': comment.timestamp.isoformat(),
+    }
+    publish(comment.idea_id, 'comment', data, using)
+
+
+def format_event(event):
+    return f'event: {event.name}\ndata: {json.dumps(event.data, cls=DjangoJSONEncoder)}\n\n'
+
+
+async def stream(subscription):
+    """Yield ``subscription``'s events in SSE format until the client goes away."""
+    heartbeat = settings.IDEAS_LIVE_HEARTBEAT
+    try:
+        # Reconnection delay for the browser, in milliseconds.
+        yield f'retry: {heartbeat * 1000}\n\n'
+        while True:
+            events = await subscription.get(heartbeat)
+            if not events:
+                # Keeps proxies from timing the stream out and finds dead clients.
+                yield ': keepalive\n\n'
+            for event in events:
+                yield format_event(event)
+    finally:
+        get_broker().unsubscribe(subscription)
+
+
+def idea_exists(pk):
+    try:
+        return Idea.objects.filter(pk=pk).exists()
+    finally:
+        # A stream stays open for as long as the page does; don't keep a
+        # database connection for it.
+        for connection in connections.all(initialized_only=True):
+            if not connection.in_atomic_block:
+                connection.close()
+
+
+STREAM_HEADERS = [
+    (b'content-type', b'text/event-stream'),
+    (b'cache-control', b'no-cache'),
+    # Tell nginx not to buffer the stream.
+    (b'x-accel-buffering', b'no'),
+    (b'x-content-type-options', b'nosniff'),
+]
+
+
+class EventStreamApplication:
+    """ASGI application that serves idea event streams itself and the rest with Django.
+
+    Django's handler gives each request through synchronous middleware a
+    thread of its own until the response ends, which for a stream is as long
+    as the page stays open. Streams are served here on the event loop
+    instead, without the middleware; the host is still validated.
+    """
+
+    def __init__(self, application):
+        self.application = application
+
+    async def __call__(self, scope, receive, send):
+        idea_id = self.stream_idea(scope)
+        if idea_id is None:
+            return await self.application(scope, receive, send)
+        request = ASGIRequest(scope, io.BytesIO())
+        try:
+            request.get_host()
+        except DisallowedHost:
+            return await self.respond(send, 400, b'Invalid host.')
+        # Outside Django's handler this runs on one thread shared by all streams.
+        if not await sync_to_async(idea_exists)(idea_id):
+            return await self.respond(send, 404, b'No Idea matches the given query.')
+        try:
+            subscription = get_broker().subscribe(idea_channel(idea_id))
+        except TooManyStreams:
+            return await self.respond(send, 503, b'Too many live streams.', [(b'retry-after', b'60')])
+        await send({'type': 'http.response.start', 'status': 200, 'headers': STREAM_HEADERS})
+        sending = asyncio.ensure_future(self.send_events(subscription, send))
+        disconnected = asyncio.ensure_future(self.wait_for_disconnect(receive))
+        try:
+            await asyncio.wait([sending, disconnected], return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in (sending, disconnected):
+                task.cancel()
+            await asyncio.gather(sending, disconnected, return_exceptions=True)
+
+    def stream_idea(self, scope):
+        """The idea id if ``scope`` is a GET of an idea's event stream, else None."""
+        if scope['type'] != 'http' or scope['method'] != 'GET':
+            return None
+        path = scope['path'].removeprefix(scope.get('root_path', ''))
+        if not path.endswith('/events/'):
+            return None
+        try:
+            match = resolve(path)
+        except Resolver404:
+            return None
+        return match.kwargs['pk'] if match.url_name == 'idea_events' else None
+
+    async def send_events(self, subscription, send):
+        async for chunk in stream(subscription):
+            await send({'type': 'http.response.body', 'body': chunk.encode(), 'more_body': True})
+
+    async def wait_for_disconnect(self, receive):
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+    async def respond(self, send, status, body, headers=()):
+        headers = [(b'content-type', b'text/plain; charset=utf-8'), *headers]
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': body})
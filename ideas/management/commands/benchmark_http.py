@@ -0,0 +1,81 @@
+import http.client
+import threading
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ideas.benchmarking import format_summary, summarize
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure requests/sec and latency of a running server, e.g. gunicorn '
+        'started with and without persistent or pooled database connections.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('url', help='e.g. http://127.0.0.1:8000/')
+        parser.add_argument('--concurrency', type=int, default=16)
+        parser.add_argument('--requests', type=int, default=2000, help='Total requests.')
+        parser.add_argument(
+            '--header',
+            action='append',
+            default=[],
+            help='Extra request header, e.g. "Cookie: sessionid=..." to benchmark a signed-in user.',
+        )
+
+    def handle(self, *args, url, concurrency, requests, header, **options):
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https'):
+            raise CommandError('Only http:// and https:// URLs are supported.')
+        path = parts.path or '/'
+        if parts.query:
+            path += f'?{parts.query}'
+        headers = dict(line.split(':', 1) for line in header)
+        headers = {name.strip(): value.strip() for name, value in headers.items()}
+        connection_class = (
+            http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        )
+
+        samples, errors = [], []
+        remaining = iter(range(requests))
+        lock = threading.Lock()
+
+        def worker():
+            # One keep-alive connection per simulated client.
+            connection = connection_class(parts.hostname, parts.port, timeout=30)
+            try:
+                while True:
+                    with lock:
+                        if next(remaining, None) is None:
+                            return
+                    start = time.perf_counter()
+                    try:
+                        connection.request('GET', path, headers=headers)
+                        response = connection.getresponse()
+                        response.read()
+                    except (OSError, http.client.HTTPException) as exc:
+                        errors.append(exc)
+                        connection.close()
+                        continue
+                    samples.append(time.perf_counter() - start)
+                    if response.status != 200:
+                        errors.append(response.status)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        if not samples:
+            raise CommandError(f'No successful requests; first error: {errors[0]!r}')
+        self.stdout.write(format_summary(path, summarize(samples)))
+        self.stdout.write(
+            f'{"":<28} {len(samples) / elapsed:8.1f} requests/s, {len(errors)} errors'
+        )
@@ -0,0 +1,66 @@
+import random
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from ideas.benchmarking import TextGenerator, format_summary, isolated_database, measure, summarize
+from ideas.models import Idea
+from ideas.pagination import KeysetPaginator
+from ideas.search import IcontainsSearchBackend, get_search_backend
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare home-page search latency of the icontains scan and the full-text '
+        'backend on a throwaway database filled with synthetic ideas.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ideas', type=int, default=100_000)
+        parser.add_argument('--queries', type=int, default=50, help='Queries per kind.')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, ideas, queries, batch_size, seed, **options):
+        rng = random.Random(seed)
+        text = TextGenerator(rng)
+        words = text.words
+        with isolated_database():
+            self.populate(text, ideas, batch_size)
+            # LIKE stops as soon as a page of matches is found, so common words
+            # are its best case and selective terms its worst; report each kind.
+            kinds = {
+                'common word': lambda: rng.choice(words[:5]),
+                'mid word': lambda: rng.choice(words[50:200]),
+                'rare word': lambda: rng.choice(words[-1000:]),
+                'prefix': lambda: rng.choice(words[:200])[:4],
+                'two words': lambda: ' '.join(rng.sample(words[:200], 2)),
+                'no match': lambda: 'zeppelin',
+            }
+            backends = [IcontainsSearchBackend(), get_search_backend()]
+            for kind, make_term in kinds.items():
+                terms = [make_term() for _ in range(queries)]
+                for backend in backends:
+                    samples = []
+                    for term in terms:
+                        samples.extend(measure(lambda: self.first_page(backend, term), 1))
+                    label = f'{kind} / {type(backend).__name__}'
+                    self.stdout.write(format_summary(label, summarize(samples), 44))
+
+    def populate(self, text, total, batch_size):
+        submitter = User.objects.create_user(username='benchmark')
+        for start in range(0, total, batch_size):
+            Idea.objects.bulk_create(
+                Idea(
+                    title=text.sentence(6).capitalize(),
+                    description=text.sentence(60),
+                    submitter=submitter,
+                )
+                for _ in range(min(batch_size, total - start))
+            )
+        self.stdout.write(f'Inserted {total} ideas.')
+
+    def first_page(self, backend, term):
+        keys = (backend.rank_field, 'id') if backend.ranked else ('submission_date', 'id')
+        queryset = backend.search(Idea.objects.select_related('category', 'submitter'), term)
+        return KeysetPaginator(queryset, keys).page()
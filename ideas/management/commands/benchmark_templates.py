@@ -0,0 +1,100 @@
+import random
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.sessions.backends.cache import SessionStore
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.template.loader import render_to_string
+from django.test import RequestFactory, override_settings
+
+from ideas.benchmarking import TextGenerator, format_summary, isolated_database, measure, summarize
+from ideas.models import Category, Idea
+
+# A throwaway cache, so cold runs can clear it without touching the real one,
+# big enough to hold every card of the page.
+BENCHMARK_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'template-benchmark',
+        'OPTIONS': {'MAX_ENTRIES': 100_000},
+    }
+}
+
+
+def uncached_templates():
+    """The project's TEMPLATES with every template re-read and re-parsed on use."""
+    engine = dict(settings.TEMPLATES[0])
+    options = dict(engine['OPTIONS'])
+    loaders = options.get('loaders')
+    if loaders and loaders[0][0] == 'django.template.loaders.cached.Loader':
+        options['loaders'] = loaders[0][1]
+    else:
+        engine.pop('APP_DIRS', None)
+        options['loaders'] = [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]
+    engine['OPTIONS'] = options
+    return [engine, *settings.TEMPLATES[1:]]
+
+
+class Command(BaseCommand):
+    help = (
+        'Time rendering ideas/home.html with a long list of ideas, without the '
+        'cached template loader, with it and no cached idea cards, and with '
+        'every card cached. Uses a throwaway database and cache.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ideas', type=int, default=1000, help='Ideas on the rendered page.')
+        parser.add_argument('--repeat', type=int, default=20, help='Timed renders per case.')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, ideas, repeat, seed, **options):
+        text = TextGenerator(random.Random(seed))
+        with isolated_database(), override_settings(CACHES=BENCHMARK_CACHES):
+            request = self.make_request(text, ideas)
+            context = {
+                'ideas': list(Idea.objects.for_feed()[:ideas]),
+                'page': None,
+                'categories': list(Category.objects.all()),
+                'status_choices': Idea.STATUS_CHOICES,
+                'search_query': '',
+                'selected_sort': '',
+                'selected_period': 'week',
+            }
+
+            def render():
+                return render_to_string('ideas/home.html', context, request)
+
+            def render_cold():
+                cache.clear()
+                return render()
+
+            with override_settings(TEMPLATES=uncached_templates()):
+                self.report('uncached loader, cold cards', render_cold, repeat)
+            self.report('cached loader, cold cards', render_cold, repeat)
+            render()
+            self.report('cached loader, warm cards', render, repeat)
+
+    def make_request(self, text, total):
+        user = User.objects.create_user(username='benchmark')
+        categories = Category.objects.bulk_create(Category(name=word) for word in text.words[:10])
+        Idea.objects.bulk_create(
+            Idea(
+                title=text.sentence(6).capitalize(),
+                description=text.sentence(60),
+                category=categories[n % len(categories)],
+                submitter=user,
+            )
+            for n in range(total)
+        )
+        request = RequestFactory().get('/')
+        request.user = user
+        request.session = SessionStore()
+        return request
+
+    def report(self, label, render, repeat):
+        render()
+        self.stdout.write(format_summary(label, summarize(measure(render, repeat)), 32))
@@ -0,0 +1,185 @@
+import contextlib
+import logging
+import random
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Count
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ideas.benchmarking import format_summary, summarize
+from ideas.models import Category, Idea, UserProfile
+from ideas.urls import urlpatterns
+
+# (label, url name, method, who, data). ``who`` picks the client: a reviewer,
+# the most prolific submitter, a signed-out visitor, or a fresh session that
+# is thrown away afterwards. URLs in IDEA_URLS get a random sampled idea
+# (edit_idea one of the submitter's); data 'idea' is a valid IdeaForm post
+# and 'bulk' a page of sampled ideas for a bulk status change.
+CASES = [
+    ('home', 'home', 'get', 'reviewer', None),
+    ('home (anonymous)', 'home', 'get', 'anonymous', None),
+    ('home ?sort=hot', 'home', 'get', 'reviewer', {'sort': 'hot'}),
+    ('home ?sort=top', 'home', 'get', 'reviewer', {'sort': 'top', 'period': 'all'}),
+    ('home ?q=', 'home', 'get', 'reviewer', {'q': 'data'}),
+    ('idea_detail', 'idea_detail', 'get', 'reviewer', None),
+    ('idea_detail (anonymous)', 'idea_detail', 'get', 'anonymous', None),
+    ('submit_idea', 'submit_idea', 'get', 'submitter', None),
+    ('submit_idea POST', 'submit_idea', 'post', 'submitter', 'idea'),
+    ('edit_idea', 'edit_idea', 'get', 'submitter', None),
+    ('edit_idea POST', 'edit_idea', 'post', 'submitter', 'idea'),
+    ('update_idea_status POST', 'update_idea_status', 'post', 'reviewer', {'status': 'approved'}),
+    ('bulk_update_idea_status POST', 'bulk_update_idea_status', 'post', 'reviewer', 'bulk'),
+    ('vote POST', 'vote', 'post', 'reviewer', {'vote_type': 'upvote'}),
+    ('vote_api POST', 'vote_api', 'post', 'reviewer', {'vote_type': 'upvote'}),
+    ('add_comment POST', 'add_comment', 'post', 'reviewer', {'content': 'Benchmark comment'}),
+    # The test client is WSGI, so this times the 204 refusal, not a stream.
+    ('idea_events', 'idea_events', 'get', 'anonymous', None),
+    ('my_ideas', 'my_ideas', 'get', 'submitter', None),
+    ('review_dashboard', 'review_dashboard', 'get', 'reviewer', None),
+    ('stats', 'stats', 'get', 'reviewer', None),
+    ('export_ideas', 'export_ideas', 'get', 'reviewer', {'status': 'implemented', 'q': 'data'}),
+    ('register', 'register', 'get', 'anonymous', None),
+    ('login', 'login', 'get', 'anonymous', None),
+    ('logout POST', 'logout', 'post', 'fresh', None),
+]
+BULK_SIZE = 50
+IDEA_URLS = {
+    'idea_detail',
+    'edit_idea',
+    'update_idea_status',
+    'vote',
+    'vote_api',
+    'add_comment',
+    'idea_events',
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Request every URL in ideas/urls.py against the configured database and '
+        'report p50/p95/p99 latency and queries per request. Writes are rolled '
+        'back, so runs are repeatable; fill the database with '
+        'generate_synthetic_data first.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Timed requests per case.')
+        parser.add_argument('--warmup', type=int, default=10, help='Untimed requests per case.')
+        parser.add_argument('--ideas', type=int, default=500, help='Ideas to sample from.')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--only', action='append', default=[], help='Run only these URL names.')
+
+    def handle(self, *args, requests, warmup, ideas, seed, only, **options):
+        missing = {pattern.name for pattern in urlpatterns} - {case[1] for case in CASES}
+        if missing:
+            raise CommandError(f'No benchmark case for: {", ".join(sorted(missing))}')
+        self.rng = random.Random(seed)
+        self.setup_fixtures(ideas)
+
+        # Error pages and their log lines would otherwise dominate the timings.
+        logging.disable(logging.ERROR)
+        try:
+            with override_settings(DEBUG=False, ALLOWED_HOSTS=['testserver']):
+                for case in CASES:
+                    if only and case[1] not in only:
+                        continue
+                    self.run_case(*case, requests=requests, warmup=warmup)
+        finally:
+            logging.disable(logging.NOTSET)
+
+    def setup_fixtures(self, sample):
+        reviewer = (
+            UserProfile.objects.filter(role=UserProfile.ROLE_REVIEWER)
+            .select_related('user')
+            .first()
+        )
+        submitter = (
+            Idea.objects.values('submitter')
+            .annotate(total=Count('id'))
+            .order_by('-total')
+            .values_list('submitter', flat=True)
+            .first()
+        )
+        if reviewer is None or submitter is None:
+            raise CommandError('Needs a reviewer and some ideas; run generate_synthetic_data first.')
+        self.ideas = list(Idea.objects.order_by('?').values_list('pk', flat=True)[:sample])
+        self.own_ideas = list(
+            Idea.objects.filter(submitter=submitter).order_by('?').values_list('pk', flat=True)[:sample]
+        )
+        self.category = Category.objects.values_list('pk', flat=True).first()
+        self.reviewer = reviewer.user
+        self.submitter = User.objects.get(pk=submitter)
+        self.clients = {
+            'reviewer': self.login(self.reviewer),
+            'submitter': self.login(self.submitter),
+            'anonymous': Client(),
+        }
+        self.stdout.write(
+            f'Reviewer {self.reviewer.username}, submitter {self.submitter.username} '
+            f'({len(self.own_ideas)} of their ideas sampled), {len(self.ideas)} ideas sampled.'
+        )
+
+    def login(self, user):
+        client = Client()
+        client.force_login(user)
+        return client
+
+    def request(self, name, method, who, data):
+        if name in IDEA_URLS:
+            pool = self.own_ideas if name == 'edit_idea' else self.ideas
+            path = reverse(name, args=[self.rng.choice(pool)])
+        else:
+            path = reverse(name)
+        if data == 'idea':
+            data = {
+                'title': 'Benchmark idea',
+                'description': 'Submitted by benchmark_urls.',
+                'category': self.category or '',
+                'new_category_name': '' if self.category else 'Benchmark',
+            }
+        elif data == 'bulk':
+            data = {'ideas': self.rng.sample(self.ideas, min(BULK_SIZE, len(self.ideas))), 'status': 'approved'}
+        client = self.login(self.reviewer) if who == 'fresh' else self.clients[who]
+        return getattr(client, method), path, data
+
+    def run_case(self, label, name, method, who, data, requests, warmup):
+        samples, queries, errors = [], [], 0
+        for n in range(warmup + requests):
+            send, path, payload = self.request(name, method, who, data)
+            with contextlib.ExitStack() as stack:
+                # Undo writes so every run sees the same data. Logging out
+                # deletes the throwaway session it just made, so let it commit.
+                # Transactions in the view become savepoints, which are counted.
+                if method == 'post' and name != 'logout':
+                    stack.enter_context(self.rolled_back())
+                captured = [
+                    stack.enter_context(CaptureQueriesContext(connection))
+                    for connection in connections.all()
+                ]
+                start = time.perf_counter()
+                response = send(path, payload)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+                elapsed = time.perf_counter() - start
+            if n < warmup:
+                continue
+            samples.append(elapsed)
+            queries.append(sum(len(context) for context in captured))
+            errors += response.status_code >= 400
+        summary = format_summary(label, summarize(samples))
+        self.stdout.write(
+            f'{summary} queries mean={statistics.fmean(queries):5.1f} max={max(queries):3}'
+            + (f' errors={errors}' if errors else '')
+        )
+
+    @contextlib.contextmanager
+    def rolled_back(self):
+        with transaction.atomic(using=DEFAULT_DB_ALIAS):
+            yield
+            transaction.set_rollback(True, using=DEFAULT_DB_ALIAS)
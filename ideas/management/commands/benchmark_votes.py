@@ -0,0 +1,127 @@
+import asyncio
+import logging
+import os
+import random
+import tempfile
+import threading
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connections
+from django.test import AsyncClient, Client, override_settings
+from django.urls import reverse
+
+from ideas.benchmarking import format_summary, isolated_database, summarize
+from ideas.models import Idea
+
+MAX_ATTEMPTS = 5
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare votes/sec of the form post + redirect flow (WSGI) and the JSON '
+        'vote API (ASGI) with concurrent users on a throwaway database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=20, help='Concurrent users.')
+        parser.add_argument('--votes', type=int, default=50, help='Votes per user.')
+        parser.add_argument('--ideas', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, users, votes, ideas, seed, **options):
+        rng = random.Random(seed)
+        # Several threads share the database, so it has to live on disk.
+        path = os.path.join(tempfile.mkdtemp(), 'benchmark_votes.sqlite3')
+        # Failed requests are counted below; DEBUG error pages and their log
+        # lines would otherwise dominate the timings.
+        logging.disable(logging.ERROR)
+        try:
+            with override_settings(DEBUG=False, ALLOWED_HOSTS=['testserver']):
+                self.run(path, rng, users, votes, ideas)
+        finally:
+            logging.disable(logging.NOTSET)
+
+    def run(self, path, rng, users, votes, ideas):
+        with isolated_database(name=path):
+            accounts, idea_ids = self.populate(users, ideas)
+            plans = [
+                [(rng.choice(idea_ids), rng.choice(['upvote', 'downvote'])) for _ in range(votes)]
+                for _ in accounts
+            ]
+            self.report('redirect flow (WSGI)', self.run_redirect_flow(accounts, plans))
+            self.report('JSON API (ASGI)', asyncio.run(self.run_api(accounts, plans)))
+
+    def populate(self, users, ideas):
+        accounts = [User.objects.create_user(username=f'voter{n}') for n in range(users)]
+        submitter = accounts[0]
+        Idea.objects.bulk_create(
+            Idea(title=f'Idea {n}', description='Benchmark idea', submitter=submitter)
+            for n in range(ideas)
+        )
+        return accounts, list(Idea.objects.values_list('pk', flat=True))
+
+    def run_redirect_flow(self, accounts, plans):
+        samples, errors = [], []
+
+        def worker(user, plan):
+            client = Client()
+            client.force_login(user)
+            backoff = random.Random()
+            try:
+                for pk, vote_type in plan:
+                    start = time.perf_counter()
+                    # SQLite rejects concurrent writers with "database is
+                    # locked"; retry like a user clicking again, counting each
+                    # failure, and give the vote up after a few attempts.
+                    for attempt in range(MAX_ATTEMPTS):
+                        try:
+                            response = client.post(
+                                reverse('vote', args=[pk]), {'vote_type': vote_type}, follow=True
+                            )
+                        except OperationalError as exc:
+                            errors.append(exc)
+                            time.sleep(backoff.uniform(0, 0.05 * 2**attempt))
+                            continue
+                        samples.append(time.perf_counter() - start)
+                        if response.status_code != 200:
+                            errors.append(response.status_code)
+                        break
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker, args=pair) for pair in zip(accounts, plans)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return samples, errors, time.perf_counter() - start
+
+    async def run_api(self, accounts, plans):
+        samples, errors = [], []
+
+        async def worker(client, plan):
+            for pk, vote_type in plan:
+                start = time.perf_counter()
+                response = await client.post(reverse('vote_api', args=[pk]), {'vote_type': vote_type})
+                samples.append(time.perf_counter() - start)
+                if response.status_code != 200:
+                    errors.append(response.status_code)
+
+        clients = []
+        for user in accounts:
+            client = AsyncClient()
+            await client.aforce_login(user)
+            clients.append(client)
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client, plan) for client, plan in zip(clients, plans)))
+        return samples, errors, time.perf_counter() - start
+
+    def report(self, label, result):
+        samples, errors, elapsed = result
+        self.stdout.write(format_summary(label, summarize(samples), 24))
+        self.stdout.write(
+            f'{"":<24} {len(samples) / elapsed:8.1f} votes/s, {len(errors)} failed requests'
+        )
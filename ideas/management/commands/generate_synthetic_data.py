@@ -0,0 +1,205 @@
+import datetime
+import random
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from ideas.benchmarking import TextGenerator, zipf_cum_weights
+from ideas.models import Category, Comment, Idea, UserProfile, Vote
+
+STATUS_WEIGHTS = {'pending': 60, 'approved': 20, 'rejected': 12, 'implemented': 8}
+REVIEWER_SHARE = 0.01
+REPLY_SHARE = 0.4
+
+
+class Command(BaseCommand):
+    help = (
+        'Add synthetic users, ideas, votes and threaded comments to the database, '
+        'with production-like skew: a few users submit and vote most, a few ideas '
+        'draw most votes and comments, and recent ideas are more common.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100_000)
+        parser.add_argument('--ideas', type=int, default=1_000_000)
+        parser.add_argument(
+            '--votes',
+            type=int,
+            default=10_000_000,
+            help='Votes to attempt; repeated (idea, user) pairs are skipped.',
+        )
+        parser.add_argument('--comments', type=int, default=2_000_000)
+        parser.add_argument('--categories', type=int, default=12)
+        parser.add_argument('--days', type=int, default=730, help='Age of the oldest idea.')
+        parser.add_argument('--batch-size', type=int, default=10_000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument(
+            '--prefix',
+            default='synthetic',
+            help='Username prefix; use a new one to add more users on a later run.',
+        )
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.text = TextGenerator(self.rng)
+        self.batch_size = options['batch_size']
+
+        categories = self.create_categories(options['categories'])
+        users = self.create_users(options['users'], options['prefix'])
+        ideas = self.create_ideas(options['ideas'], options['days'], users, categories)
+        # Popularity is independent of age: shuffle which ideas rank highest.
+        popular = ideas[:]
+        self.rng.shuffle(popular)
+        self.create_votes(options['votes'], popular, users)
+        self.create_comments(options['comments'], popular, users)
+
+        self.stdout.write('Recomputing counters and hot scores...')
+        call_command('recompute_idea_counters', stdout=self.stdout)
+        self.stdout.write('Rebuilding rollups...')
+        call_command('rebuild_rollups', stdout=self.stdout)
+
+    def batches(self, total):
+        for start in range(0, total, self.batch_size):
+            yield min(self.batch_size, total - start)
+
+    def report(self, label, count, started):
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f'{label}: {count} in {elapsed:.1f}s ({count / max(elapsed, 1e-9):.0f}/s)')
+
+    def create_categories(self, total):
+        names = {f'{self.text.sentence(2).title()} {n}' for n in range(total)}
+        Category.objects.bulk_create(
+            [Category(name=name, description=self.text.sentence(12)) for name in names],
+            ignore_conflicts=True,
+        )
+        return list(Category.objects.values_list('pk', flat=True))
+
+    def create_users(self, total, prefix):
+        started = time.perf_counter()
+        # Hashing is slow and these accounts are only ever force-logged-in.
+        password = make_password(None)
+        for start in range(0, total, self.batch_size):
+            with transaction.atomic():
+                User.objects.bulk_create(
+                    [
+                        User(username=f'{prefix}{n}', password=password)
+                        for n in range(start, min(start + self.batch_size, total))
+                    ],
+                    ignore_conflicts=True,
+                )
+        users = list(
+            User.objects.filter(username__startswith=prefix)
+            .order_by('pk')
+            .values_list('pk', flat=True)
+        )
+        # bulk_create skips the signal that creates profiles.
+        missing = set(users) - set(UserProfile.objects.values_list('user_id', flat=True))
+        profiles = [
+            UserProfile(
+                user_id=pk,
+                role=(
+                    UserProfile.ROLE_REVIEWER
+                    if self.rng.random() < REVIEWER_SHARE
+                    else UserProfile.ROLE_SUBMITTER
+                ),
+            )
+            for pk in sorted(missing)
+        ]
+        UserProfile.objects.bulk_create(profiles, batch_size=self.batch_size)
+        self.report('Users', len(users), started)
+        return users
+
+    def create_ideas(self, total, days, users, categories):
+        started = time.perf_counter()
+        first_pk = (Idea.objects.order_by('-pk').values_list('pk', flat=True).first() or 0) + 1
+        submitter_weights = zipf_cum_weights(len(users), 0.8)
+        statuses = list(STATUS_WEIGHTS)
+        status_weights = list(STATUS_WEIGHTS.values())
+        now = timezone.now()
+        oldest = datetime.timedelta(days=days).total_seconds()
+        for size in self.batches(total):
+            rng = self.rng
+            submitters = rng.choices(users, cum_weights=submitter_weights, k=size)
+            with transaction.atomic():
+                Idea.objects.bulk_create(
+                    Idea(
+                        title=self.text.sentence(rng.randint(4, 9)).capitalize(),
+                        description=self.text.sentence(rng.randint(20, 120)),
+                        submitter_id=submitter,
+                        category_id=rng.choice(categories) if rng.random() < 0.95 else None,
+                        status=rng.choices(statuses, status_weights)[0],
+                        # Squaring the fraction makes recent ideas more common.
+                        submission_date=now
+                        - datetime.timedelta(seconds=oldest * rng.random() ** 2),
+                    )
+                    for submitter in submitters
+                )
+        ideas = list(
+            Idea.objects.filter(pk__gte=first_pk).order_by('pk').values_list('pk', flat=True)
+        )
+        self.report('Ideas', len(ideas), started)
+        return ideas
+
+    def create_votes(self, total, ideas, users):
+        started = time.perf_counter()
+        before = Vote.objects.count()
+        idea_weights = zipf_cum_weights(len(ideas))
+        voter_weights = zipf_cum_weights(len(users), 0.6)
+        # Each idea has its own share of upvotes, mostly positive.
+        upvote_share = {pk: self.rng.betavariate(5, 2) for pk in ideas}
+        for size in self.batches(total):
+            rng = self.rng
+            pairs = set(
+                zip(
+                    rng.choices(ideas, cum_weights=idea_weights, k=size),
+                    rng.choices(users, cum_weights=voter_weights, k=size),
+                )
+            )
+            with transaction.atomic():
+                Vote.objects.bulk_create(
+                    [
+                        Vote(
+                            idea_id=idea,
+                            user_id=user,
+                            vote_type='upvote' if rng.random() < upvote_share[idea] else 'downvote',
+                        )
+                        for idea, user in pairs
+                    ],
+                    ignore_conflicts=True,
+                )
+        self.report('Votes', Vote.objects.count() - before, started)
+
+    def create_comments(self, total, ideas, users):
+        started = time.perf_counter()
+        idea_weights = zipf_cum_weights(len(ideas))
+        commenter_weights = zipf_cum_weights(len(users), 0.7)
+        threads = {}  # idea pk -> pks of its comments, to reply to
+        created = 0
+        for size in self.batches(total):
+            rng = self.rng
+            comments = []
+            for idea, user in zip(
+                rng.choices(ideas, cum_weights=idea_weights, k=size),
+                rng.choices(users, cum_weights=commenter_weights, k=size),
+            ):
+                existing = threads.get(idea)
+                parent = rng.choice(existing) if existing and rng.random() < REPLY_SHARE else None
+                comments.append(
+                    Comment(
+                        idea_id=idea,
+                        user_id=user,
+                        parent_comment_id=parent,
+                        content=self.text.sentence(rng.randint(5, 60)),
+                    )
+                )
+            with transaction.atomic():
+                Comment.objects.bulk_create(comments)
+            for comment in comments:
+                threads.setdefault(comment.idea_id, []).append(comment.pk)
+            created += len(comments)
+        self.report('Comments', created, started)
@@ -0,0 +1,82 @@
+import csv
+import itertools
+import time
+from pathlib import Path
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from ideas.cache import bump_feed_generation
+from ideas.importing import BATCH_SIZE, FORMATS, IMPORTERS, ImportRowError, read_records
+
+
+class Command(BaseCommand):
+    help = (
+        'Import categories, users or ideas from a CSV file with a header row or '
+        'a JSON Lines file, upserting on category name, username or idea '
+        'external_id in batches. Import categories and users before the ideas '
+        'that name them. Safe to re-run; --checkpoint resumes an interrupted import.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=list(IMPORTERS))
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=FORMATS, help='Defaults to jsonl for .jsonl files, else csv.')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help=f'Records upserted per transaction (default: {BATCH_SIZE}).',
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help=(
+                'File to record the last imported record number in after every batch. '
+                'If it exists, the import resumes after that record.'
+            ),
+        )
+        parser.add_argument(
+            '--skip-rollups',
+            action='store_true',
+            help='Don\'t rebuild the rollups after importing ideas, e.g. when more files follow.',
+        )
+
+    def handle(self, *args, kind, path, batch_size, checkpoint, **options):
+        importer = IMPORTERS[kind]
+        checkpoint = Path(checkpoint) if checkpoint else None
+        done = int(checkpoint.read_text()) if checkpoint and checkpoint.exists() else 0
+        records = enumerate(read_records(path, options['format']), 1)
+        if done:
+            self.stdout.write(f'Resuming after record {done}.')
+            records = itertools.islice(records, done, None)
+
+        imported = skipped = 0
+        started = time.perf_counter()
+        try:
+            while batch := list(itertools.islice(records, batch_size)):
+                with transaction.atomic():
+                    count, errors = importer(batch)
+                # Written after the commit: a crash in between re-imports one
+                # batch, which the upserts make harmless.
+                done = batch[-1][0]
+                if checkpoint:
+                    checkpoint.write_text(str(done))
+                for number, message in errors:
+                    self.stderr.write(f'Record {number}: {message}')
+                imported += count
+                skipped += len(errors)
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f'{kind}: {done} records read, {imported} imported, {skipped} skipped '
+                    f'({imported / max(elapsed, 1e-9):.0f}/s)'
+                )
+        except (ImportRowError, csv.Error, OSError) as exc:
+            raise CommandError(f'Stopped after record {done}: {exc}') from exc
+
+        if kind == 'ideas' and imported:
+            bump_feed_generation()
+            if not options['skip_rollups']:
+                self.stdout.write('Rebuilding rollups...')
+                call_command('rebuild_rollups', stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS(f'Imported {imported} {kind}, skipped {skipped}.'))
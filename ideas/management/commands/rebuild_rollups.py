@@ -0,0 +1,105 @@
+import heapq
+import itertools
+from operator import itemgetter
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, Value
+from django.db.models.functions import Coalesce, TruncDate
+
+from ideas.models import (
+    UNCATEGORIZED,
+    CategoryDailyRollup,
+    CategoryStatusRollup,
+    Comment,
+    Idea,
+    Task,
+    UserDailyRollup,
+    Vote,
+)
+
+
+def daily_totals(queryset, date_field, key):
+    """``(day, key, count)`` rows of ``queryset`` grouped and ordered by day and key."""
+    return (
+        queryset.order_by()
+        .values(day=TruncDate(date_field), key=key)
+        .annotate(n=Count('pk'))
+        .order_by('day', 'key')
+        .values_list('day', 'key', 'n')
+    )
+
+
+def tagged(field, rows):
+    for day, key, n in rows:
+        yield day, key, field, n
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute the rollup tables behind the stats page from ideas, votes '
+        'and comments, e.g. after bulk loads or deletions in the admin.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, batch_size, **options):
+        self.batch_size = batch_size
+        ideas_category = Coalesce('category', Value(UNCATEGORIZED))
+        votes_category = Coalesce('idea__category', Value(UNCATEGORIZED))
+        votes = Vote.objects.all()
+        with transaction.atomic():
+            for model in (CategoryDailyRollup, UserDailyRollup, CategoryStatusRollup):
+                model.objects.all().delete()
+            # The rebuild counts what queued rollup updates would add; drop them.
+            Task.objects.filter(name='update_rollups').delete()
+
+            self.rebuild(
+                CategoryDailyRollup,
+                'category_pk',
+                {
+                    'ideas': daily_totals(Idea.objects.all(), 'submission_date', ideas_category),
+                    'upvotes': daily_totals(votes.filter(vote_type='upvote'), 'voted_at', votes_category),
+                    'downvotes': daily_totals(votes.filter(vote_type='downvote'), 'voted_at', votes_category),
+                    'comments': daily_totals(Comment.objects.all(), 'timestamp', votes_category),
+                },
+            )
+            self.rebuild(
+                UserDailyRollup,
+                'user_id',
+                {
+                    'ideas': daily_totals(Idea.objects.all(), 'submission_date', F('submitter')),
+                    'votes': daily_totals(votes, 'voted_at', F('user')),
+                    'comments': daily_totals(Comment.objects.all(), 'timestamp', F('user')),
+                },
+            )
+            statuses = (
+                Idea.objects.order_by()
+                .values('status', key=ideas_category)
+                .annotate(n=Count('pk'))
+                .values_list('key', 'status', 'n')
+            )
+            CategoryStatusRollup.objects.bulk_create(
+                CategoryStatusRollup(category_pk=key, status=status, ideas=n)
+                for key, status, n in statuses
+            )
+        self.stdout.write(self.style.SUCCESS('Rebuilt rollups.'))
+
+    def rebuild(self, model, key_field, sources):
+        """Merge the ``(day, key)``-ordered ``sources`` into one row per day and key.
+
+        Each source is streamed, so memory stays flat however many rows the
+        rollup ends up with.
+        """
+        streams = [tagged(field, rows.iterator()) for field, rows in sources.items()]
+        merged = heapq.merge(*streams, key=itemgetter(0, 1))
+        rows = (
+            model(day=day, **{key_field: key}, **{field: n for _, _, field, n in group})
+            for (day, key), group in itertools.groupby(merged, key=itemgetter(0, 1))
+        )
+        created = 0
+        while batch := list(itertools.islice(rows, self.batch_size)):
+            model.objects.bulk_create(batch)
+            created += len(batch)
+        self.stdout.write(f'{model._meta.verbose_name_plural}: {created} rows')
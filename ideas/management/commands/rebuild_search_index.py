@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from ideas.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = 'Create the full-text search index if needed and rebuild it from the ideas table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database',
+            default=DEFAULT_DB_ALIAS,
+            help='Database alias to rebuild (default: "default").',
+        )
+
+    def handle(self, *args, database, **options):
+        backend = get_search_backend(database)
+        backend.rebuild()
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt search index using {type(backend).__name__}.')
+        )
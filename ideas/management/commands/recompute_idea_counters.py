@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from ideas.models import Idea
+
+
+class Command(BaseCommand):
+    help = 'Recompute the stored vote and comment counters and hot ranking on every idea.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Number of ideas updated per transaction (default: 5000).',
+        )
+
+    def handle(self, *args, batch_size, **options):
+        ids = Idea.objects.order_by('pk').values_list('pk', flat=True)
+        last_pk = 0
+        updated = 0
+        while True:
+            batch = list(ids.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            with transaction.atomic():
+                ideas = Idea.objects.filter(pk__in=batch)
+                updated += ideas.recompute_counters()
+                ideas.refresh_hot_scores()
+            last_pk = batch[-1]
+        self.stdout.write(self.style.SUCCESS(f'Fixed the counters of {updated} ideas.'))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from ideas.models import Idea
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute the hot ranking of every idea from its stored score. Votes keep '
+        'it current; run this after bulk imports, counter repairs or a change to '
+        'the ranking constants.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of ideas updated per transaction (default: 1000).',
+        )
+
+    def handle(self, *args, batch_size, **options):
+        ids = Idea.objects.order_by('pk').values_list('pk', flat=True)
+        last_pk = 0
+        updated = 0
+        while True:
+            batch = list(ids.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            with transaction.atomic():
+                updated += Idea.objects.filter(pk__in=batch).refresh_hot_scores()
+            last_pk = batch[-1]
+        self.stdout.write(self.style.SUCCESS(f'Changed the hot score of {updated} ideas.'))
@@ -0,0 +1,60 @@
+import signal
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from ideas.tasks import claim, run, units
+
+
+def run_unit(unit):
+    # Each pool thread has its own connection; treat every unit like a request.
+    close_old_connections()
+    try:
+        return run(unit)
+    finally:
+        close_old_connections()
+
+
+class Command(BaseCommand):
+    help = (
+        'Run queued background tasks (ideas.tasks): claim due tasks in batches, '
+        'run them on a thread pool and retry failures with backoff. Run one per '
+        'host (or more; claims never overlap) under a process supervisor, or '
+        'with --once from cron.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=4, help='Units of work run at once.')
+        parser.add_argument('--batch-size', type=int, default=None, help='Tasks claimed per round.')
+        parser.add_argument('--poll', type=float, default=1.0, help='Seconds to wait when idle.')
+        parser.add_argument('--once', action='store_true', help='Exit when no task is due.')
+
+    def handle(self, *args, threads, batch_size, poll, once, **options):
+        batch_size = batch_size or settings.IDEAS_TASK_BATCH_SIZE
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        total = 0
+        with ThreadPoolExecutor(threads, thread_name_prefix='task') as pool:
+            try:
+                while not self.stopping:
+                    close_old_connections()
+                    tasks = claim(batch_size)
+                    if not tasks:
+                        if once:
+                            break
+                        time.sleep(poll)
+                        continue
+                    done = sum(pool.map(run_unit, units(tasks)))
+                    total += done
+                    if options['verbosity'] > 1:
+                        self.stdout.write(f'Ran {done} of {len(tasks)} tasks.')
+            except KeyboardInterrupt:
+                pass
+        self.stdout.write(self.style.SUCCESS(f'Ran {total} tasks.'))
+
+    def stop(self, signum, frame):
+        """Finish the current round, then exit."""
+        self.stopping = True
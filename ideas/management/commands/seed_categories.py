@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from ideas.models import Category
+
+DEFAULT_CATEGORIES = [
+    ('Technology', 'Innovative technology solutions and digital transformation'),
+    ('Process Improvement', 'Ideas to improve business processes and workflows'),
+    ('Customer Experience', 'Innovations to enhance customer satisfaction and engagement'),
+    ('Product Development', 'New product ideas and enhancements'),
+    ('Sustainability', 'Eco-friendly and sustainable innovation ideas'),
+    ('Education', 'Educational innovations and learning improvements'),
+    ('Other', "Other innovative ideas that don't fit specific categories"),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Create the default idea categories in one query. Existing categories, '
+        'including edited descriptions, are left alone, so it is safe to re-run.'
+    )
+
+    def handle(self, *args, **options):
+        before = Category.objects.count()
+        Category.objects.bulk_create(
+            [Category(name=name, description=description) for name, description in DEFAULT_CATEGORIES],
+            ignore_conflicts=True,
+        )
+        created = Category.objects.count() - before
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Created {created} categories; {len(DEFAULT_CATEGORIES) - created} already existed.'
+            )
+        )
@@ -0,0 +1,86 @@
+import re
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+ICON_CLASS_RE = re.compile(r'\bbi-([a-z0-9-]+)')
+GLYPH_RULE_RE = re.compile(r'\.bi-([a-z0-9-]+)::before\s*\{\s*content:\s*"\\([0-9a-f]+)"\s*;?\s*\}')
+FONT_URL_RE = re.compile(r'url\("?([^")?#]+\.woff2)')
+# Written under the first STATICFILES_DIRS entry.
+OUTPUT_DIR = Path('vendor', 'bootstrap-icons')
+# The rules Bootstrap Icons' own stylesheet applies to every icon.
+ICON_CSS = (
+    '@font-face{{font-display:block;font-family:bootstrap-icons;'
+    'src:url("fonts/bootstrap-icons.woff2") format("woff2")}}'
+    '.bi::before,[class*=" bi-"]::before,[class^=bi-]::before{{display:inline-block;'
+    'font-family:bootstrap-icons!important;font-style:normal;font-weight:400!important;'
+    'font-variant:normal;text-transform:none;line-height:1;vertical-align:-.125em;'
+    '-webkit-font-smoothing:antialiased;-moz-osx-font-smoothing:grayscale}}'
+    '{rules}\n'
+)
+
+
+def icon_sources():
+    """Templates and scripts that may name icons, excluding vendored files."""
+    directories = [Path(d) for engine in settings.TEMPLATES for d in engine['DIRS']]
+    directories += [Path(config.path, 'templates') for config in apps.get_app_configs()]
+    directories += [Path(d) for d in settings.STATICFILES_DIRS]
+    for directory in directories:
+        for pattern in ('**/*.html', '**/*.js'):
+            for path in directory.glob(pattern):
+                if 'vendor' not in path.relative_to(directory).parts:
+                    yield path
+
+
+def used_icons():
+    """Names of the Bootstrap Icons used by the project's templates and scripts."""
+    return {name for path in icon_sources() for name in ICON_CLASS_RE.findall(path.read_text())}
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuild the self-hosted Bootstrap Icons stylesheet and font with only the '
+        'icons the templates and scripts use. Run it after using a new icon, '
+        'pointing it at the full bootstrap-icons.css of a Bootstrap Icons release '
+        '(its fonts/ directory must sit next to it). Needs fontTools and brotli.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('stylesheet', help='Path to the full bootstrap-icons.css.')
+
+    def handle(self, *args, stylesheet, **options):
+        try:
+            from fontTools import subset
+        except ImportError:
+            raise CommandError('subset_icons needs fontTools: pip install fonttools brotli')
+
+        stylesheet = Path(stylesheet)
+        css = stylesheet.read_text()
+        codepoints = dict(GLYPH_RULE_RE.findall(css))
+        font_url = FONT_URL_RE.search(css)
+        if not codepoints or not font_url:
+            raise CommandError(f'{stylesheet} does not look like bootstrap-icons.css')
+        icons = sorted(used_icons())
+        unknown = [name for name in icons if name not in codepoints]
+        if unknown:
+            raise CommandError(f'Unknown icons: {", ".join(unknown)}')
+
+        output = Path(settings.STATICFILES_DIRS[0]) / OUTPUT_DIR
+        (output / 'fonts').mkdir(parents=True, exist_ok=True)
+        options = subset.Options()
+        options.flavor = 'woff2'
+        options.layout_features = []
+        options.name_IDs = []
+        options.notdef_outline = True
+        font = subset.load_font(stylesheet.parent / font_url[1], options)
+        subsetter = subset.Subsetter(options)
+        subsetter.populate(unicodes=[int(codepoints[name], 16) for name in icons])
+        subsetter.subset(font)
+        subset.save_font(font, output / 'fonts' / 'bootstrap-icons.woff2', options)
+
+        rules = ''.join(f'.bi-{name}::before{{content:"\\{codepoints[name]}"}}' for name in icons)
+        header = css[: css.index('*/') + 2] if css.startswith('/*') else ''
+        (output / 'bootstrap-icons.css').write_text(header + ICON_CSS.format(rules=rules))
+        self.stdout.write(self.style.SUCCESS(f'Wrote {len(icons)} icons to {output}.'))
@@ -0,0 +1,32 @@
+import sqlite3
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from ideas.routers import read_replicas
+
+
+class Command(BaseCommand):
+    help = (
+        'Copy the primary SQLite database into every SQLite read replica, so a '
+        'second file can stand in for a replica locally. Run it again to '
+        '"replicate"; the time in between behaves like replication lag.'
+    )
+
+    def handle(self, *args, **options):
+        primary = connections[DEFAULT_DB_ALIAS]
+        if primary.vendor != 'sqlite':
+            raise CommandError('Only SQLite primaries can be copied; real replicas replicate themselves.')
+        replicas = [alias for alias in read_replicas() if connections[alias].vendor == 'sqlite']
+        if not replicas:
+            raise CommandError('No SQLite replicas configured; set DATABASE_REPLICA_URLS.')
+
+        primary.ensure_connection()
+        for alias in replicas:
+            connections[alias].close()
+            target = sqlite3.connect(connections[alias].settings_dict['NAME'])
+            try:
+                primary.connection.backup(target)
+            finally:
+                target.close()
+            self.stdout.write(self.style.SUCCESS(f'Copied {DEFAULT_DB_ALIAS} to {alias}.'))
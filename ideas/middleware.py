@@ -0,0 +1,225 @@
+import contextlib
+import contextvars
+import hashlib
+import logging
+import re
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import connections
+from django.middleware.gzip import GZipMiddleware
+from django.template.backends.django import Template
+from django.utils.cache import patch_vary_headers
+
+from .routers import read_replicas, use_primary
+
+try:
+    import brotli
+except ImportError:  # installed with whitenoise[brotli]
+    brotli = None
+
+logger = logging.getLogger('ideas.performance')
+
+_current_metrics = contextvars.ContextVar('ideas_request_metrics', default=None)
+_IN_LIST_RE = re.compile(r'IN \((?:%s, )*%s\)')
+_WHITESPACE_RE = re.compile(r'\s+')
+_ACCEPTS_BROTLI_RE = re.compile(r'\bbr\b')
+# Pages are compressed per request: quality 5 gets most of Brotli's gain over
+# gzip at a fraction of the cost of the maximum, 11.
+BROTLI_QUALITY = 5
+
+
+def query_fingerprint(sql):
+    """Identify queries that differ only in their parameters."""
+    normalized = _IN_LIST_RE.sub('IN (...)', _WHITESPACE_RE.sub(' ', sql.strip()))
+    return hashlib.sha1(normalized.encode()).hexdigest()[:12]
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.query_count = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.rendering = False
+        self.fingerprints = Counter()
+
+    def record_query(self, sql, duration):
+        self.query_count += 1
+        self.db_time += duration
+        self.fingerprints[query_fingerprint(sql)] += 1
+
+    @property
+    def duplicates(self):
+        return {fingerprint: n for fingerprint, n in self.fingerprints.items() if n > 1}
+
+    @property
+    def total_time(self):
+        return time.perf_counter() - self.started
+
+
+def current_metrics():
+    return _current_metrics.get()
+
+
+def _timed_execute(execute, sql, params, many, context):
+    metrics = _current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.record_query(sql, time.perf_counter() - start)
+
+
+def _install_template_timer():
+    render = Template.render
+    if getattr(render, 'timed', False):
+        return
+
+    def timed_render(self, context=None, request=None):
+        metrics = _current_metrics.get()
+        if metrics is None or metrics.rendering:
+            return render(self, context, request)
+        metrics.rendering = True
+        start = time.perf_counter()
+        try:
+            return render(self, context, request)
+        finally:
+            metrics.template_time += time.perf_counter() - start
+            metrics.rendering = False
+
+    timed_render.timed = True
+    Template.render = timed_render
+
+
+class QueryMetricsMiddleware:
+    """Measure SQL and template cost of every request.
+
+    Adds a ``Server-Timing`` header (visible in browser dev tools) and logs
+    one ``ideas.performance`` line per request, including fingerprints of
+    queries repeated within the request, which usually point at an N+1.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        _install_template_timer()
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        token = _current_metrics.set(metrics)
+        try:
+            with contextlib.ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(_timed_execute))
+                response = self.get_response(request)
+        finally:
+            _current_metrics.reset(token)
+        self.report(request, response, metrics)
+        return response
+
+    def report(self, request, response, metrics):
+        db_ms = metrics.db_time * 1000
+        template_ms = metrics.template_time * 1000
+        total_ms = metrics.total_time * 1000
+        if getattr(settings, 'IDEAS_SERVER_TIMING', True):
+            response['Server-Timing'] = ', '.join(
+                [
+                    f'db;dur={db_ms:.1f};desc="{metrics.query_count} queries"',
+                    f'tpl;dur={template_ms:.1f}',
+                    f'total;dur={total_ms:.1f}',
+                ]
+            )
+        match = request.resolver_match
+        duplicates = metrics.duplicates
+        threshold = getattr(settings, 'IDEAS_DUPLICATE_QUERY_WARNING', 5)
+        level = logging.WARNING if any(n >= threshold for n in duplicates.values()) else logging.INFO
+        logger.log(
+            level,
+            'method=%s path=%s view=%s status=%s queries=%d db_ms=%.1f template_ms=%.1f '
+            'total_ms=%.1f duplicate_queries=%s',
+            request.method,
+            request.path,
+            match.view_name if match else '-',
+            response.status_code,
+            metrics.query_count,
+            db_ms,
+            template_ms,
+            total_ms,
+            ','.join(f'{fingerprint}x{n}' for fingerprint, n in duplicates.items()) or '-',
+            extra={
+                'view_name': match.view_name if match else None,
+                'status_code': response.status_code,
+                'query_count': metrics.query_count,
+                'db_ms': round(db_ms, 1),
+                'template_ms': round(template_ms, 1),
+                'total_ms': round(total_ms, 1),
+                'duplicate_queries': duplicates,
+            },
+        )
+
+
+class PrimaryPinningMiddleware:
+    """Read from the primary during and shortly after a user's writes.
+
+    Replicas lag behind the primary, so without this a user could vote and
+    then not see their vote. Any request with an unsafe method is served
+    from the primary and sets a cookie that keeps the browser's requests
+    there for ``IDEAS_PRIMARY_PIN_SECONDS``.
+    """
+
+    cookie_name = 'ideas_primary'
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        wrote = request.method not in ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+        if not read_replicas() or not (wrote or self.cookie_name in request.COOKIES):
+            return self.get_response(request)
+        with use_primary():
+            response = self.get_response(request)
+        if wrote:
+            response.set_cookie(
+                self.cookie_name,
+                '1',
+                max_age=getattr(settings, 'IDEAS_PRIMARY_PIN_SECONDS', 10),
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """Compress responses with Brotli for clients that accept it, else gzip.
+
+    Without the ``brotli`` package this is plain ``GZipMiddleware``.
+    Streaming responses are left to it as well, except event streams, which
+    are sent as they are so no compressor holds events back.
+    """
+
+    def process_response(self, request, response):
+        if response.get('Content-Type', '').startswith('text/event-stream'):
+            return response
+        if (
+            brotli is None
+            or response.streaming
+            or response.has_header('Content-Encoding')
+            or len(response.content) < 200
+            or not _ACCEPTS_BROTLI_RE.search(request.headers.get('Accept-Encoding', ''))
+        ):
+            return super().process_response(request, response)
+        patch_vary_headers(response, ('Accept-Encoding',))
+        compressed = brotli.compress(response.content, quality=BROTLI_QUALITY)
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response.headers['Content-Length'] = str(len(compressed))
+        # The encoded body differs from the one the ETag was computed for.
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = 'br'
+        return response
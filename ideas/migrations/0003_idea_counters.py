@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:51
+
+from django.db import migrations, models
+from django.db.models import Case, Count, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    Idea = apps.get_model('ideas', 'Idea')
+    Vote = apps.get_model('ideas', 'Vote')
+    Comment = apps.get_model('ideas', 'Comment')
+    votes = Vote.objects.filter(idea=OuterRef('pk')).order_by().values('idea')
+    comments = Comment.objects.filter(idea=OuterRef('pk')).order_by().values('idea')
+
+    def total(queryset, aggregate):
+        return Coalesce(Subquery(queryset.annotate(n=aggregate).values('n')), Value(0))
+
+    Idea.objects.update(
+        upvotes=total(votes.filter(vote_type='upvote'), Count('pk')),
+        downvotes=total(votes.filter(vote_type='downvote'), Count('pk')),
+        score=total(votes, Sum(Case(When(vote_type='upvote', then=1), default=-1))),
+        comment_total=total(comments, Count('pk')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ideas', '0002_userprofile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='idea',
+            name='comment_total',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='idea',
+            name='downvotes',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='idea',
+            name='score',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='idea',
+            name='upvotes',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
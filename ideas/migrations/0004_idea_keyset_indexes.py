@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:52
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ideas', '0003_idea_counters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='idea',
+            options={'ordering': ['-submission_date', '-id']},
+        ),
+        migrations.AddIndex(
+            model_name='idea',
+            index=models.Index(fields=['-submission_date', '-id'], name='idea_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='idea',
+            index=models.Index(fields=['status', '-submission_date', '-id'], name='idea_status_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='idea',
+            index=models.Index(fields=['category', '-submission_date', '-id'], name='idea_category_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='idea',
+            index=models.Index(fields=['category', 'status', '-submission_date', '-id'], name='idea_cat_status_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='idea',
+            index=models.Index(fields=['submitter', '-submission_date', '-id'], name='idea_submitter_recent_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+from django.db import migrations
+
+
+def install_search_index(apps, schema_editor):
+    from ideas.search import VENDOR_BACKENDS
+
+    backend_class = VENDOR_BACKENDS.get(schema_editor.connection.vendor)
+    if backend_class:
+        backend_class(schema_editor.connection.alias).rebuild()
+
+
+def remove_search_index(apps, schema_editor):
+    from ideas.search import VENDOR_BACKENDS
+
+    backend_class = VENDOR_BACKENDS.get(schema_editor.connection.vendor)
+    if backend_class:
+        backend_class(schema_editor.connection.alias).uninstall()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ideas', '0004_idea_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search_index, remove_search_index),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:05
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ideas', '0005_idea_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='idea',
+            name='updated_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:50
+
+from django.conf import settings
+from django.db import migrations, models
+
+from ideas.models import hot_score
+
+
+def backfill_hot_scores(apps, schema_editor):
+    Idea = apps.get_model('ideas', 'Idea')
+    ideas = [
+        Idea(pk=pk, hot_score=hot_score(score, submission_date))
+        for pk, score, submission_date in Idea.objects.values_list('pk', 'score', 'submission_date')
+    ]
+    Idea.objects.bulk_update(ideas, ['hot_score'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ideas', '0006_idea_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='idea',
+            name='hot_score',
+            field=models.FloatField(default=0),
+        ),
+        migrations.RunPython(backfill_hot_scores, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='idea',
+            index=models.Index(fields=['-hot_score', '-id'], name='idea_hot_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='idea',
+            index=models.Index(fields=['-score', '-id'], name='idea_top_idx'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:07
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ideas', '0008_ideastatuschange'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategoryDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('category_pk', models.IntegerField()),
+                ('shard', models.PositiveSmallIntegerField(default=0)),
+                ('ideas', models.IntegerField(db_default=0, default=0)),
+                ('upvotes', models.IntegerField(db_default=0, default=0)),
+                ('downvotes', models.IntegerField(db_default=0, default=0)),
+                ('comments', models.IntegerField(db_default=0, default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('day', 'category_pk', 'shard'), name='category_daily_rollup_key')],
+            },
+        ),
+        migrations.CreateModel(
+            name='CategoryStatusRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category_pk', models.IntegerField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('approved', 'Approved'), ('rejected', 'Rejected'), ('implemented', 'Implemented')], max_length=20)),
+                ('ideas', models.IntegerField(db_default=0, default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('category_pk', 'status'), name='category_status_rollup_key')],
+            },
+        ),
+        migrations.CreateModel(
+            name='UserDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('ideas', models.IntegerField(db_default=0, default=0)),
+                ('votes', models.IntegerField(db_default=0, default=0)),
+                ('comments', models.IntegerField(db_default=0, default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('day', 'user'), name='user_daily_rollup_key')],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ideas', '0009_rollups'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='idea',
+            index=models.Index(fields=['title'], name='idea_title_idx', opclasses=['varchar_pattern_ops']),
+        ),
+    ]
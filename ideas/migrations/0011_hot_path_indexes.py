@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:26
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ideas', '0010_idea_title_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['idea', 'parent_comment', 'timestamp', 'id'], name='comment_thread_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='idea',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['-submission_date', '-id'], name='idea_pending_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vote',
+            index=models.Index(fields=['idea', 'vote_type'], name='vote_idea_type_idx'),
+        ),
+    ]
@@ -1,7 +1,32 @@
-from django.db import models
+import datetime
+import math
+
+from django.conf import settings
+from django.db import models, router, transaction
+from django.db.models import Case, Count, F, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import User
 from django.utils import timezone
 
+from .cache import bump_feed_generation
+
+# The hot ranking adds one point per tenfold increase in score to a point
+# per HOT_DECAY_SECONDS of recency, so newer ideas overtake older ones
+# without the stored scores ever having to be decayed.
+HOT_EPOCH = datetime.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc)
+HOT_DECAY_SECONDS = 45000
+
+
+def hot_weight(score):
+    return math.copysign(math.log10(max(abs(score), 1)), score)
+
+
+def hot_score(score, submission_date):
+    """Return the ``Idea.hot_score`` for an idea with ``score`` submitted at ``submission_date``."""
+    return hot_weight(score) + (submission_date - HOT_EPOCH).total_seconds() / HOT_DECAY_SECONDS
+
+
 class Category(models.Model):
     name = models.CharField(max_length=50, unique=True)
     description = models.TextField(blank=True)
@@ -15,6 +40,105 @@ class Category(models.Model):
         return self.name
 
 
+class IdeaQuerySet(models.QuerySet):
+    def for_feed(self):
+        """Ideas with everything an idea card renders, in one query.
+
+        Vote and comment totals come from the stored counters, so feed pages
+        never join or prefetch Vote/Comment rows.
+        """
+        return self.select_related('category', 'submitter')
+
+    def recompute_counters(self):
+        """Rebuild the stored vote/comment counters from Vote and Comment rows.
+
+        Only ideas whose counters drifted are written; they get a new
+        ``updated_at`` so cached cards and fragments show the fixed numbers.
+        Returns how many were fixed.
+        """
+        votes = Vote.objects.filter(idea=OuterRef('pk')).order_by().values('idea')
+        comments = Comment.objects.filter(idea=OuterRef('pk')).order_by().values('idea')
+
+        def total(queryset, aggregate):
+            return Coalesce(Subquery(queryset.annotate(n=aggregate).values('n')), Value(0))
+
+        counters = {
+            'upvotes': total(votes.filter(vote_type='upvote'), Count('pk')),
+            'downvotes': total(votes.filter(vote_type='downvote'), Count('pk')),
+            'score': total(votes, Sum(Case(When(vote_type='upvote', then=1), default=-1))),
+            'comment_total': total(comments, Count('pk')),
+        }
+        drifted = Q()
+        for field, expression in counters.items():
+            drifted |= ~Q(**{field: expression})
+        fixed = self.filter(drifted).update(**counters, updated_at=timezone.now())
+        if fixed:
+            bump_feed_generation()
+        return fixed
+
+    def refresh_hot_scores(self):
+        """Recompute ``hot_score`` from the stored score of every idea in the queryset.
+
+        Only changed scores are written, with a new ``updated_at``. Returns
+        how many changed.
+        """
+        now = timezone.now()
+        ideas = [
+            Idea(pk=pk, hot_score=new, updated_at=now)
+            for pk, score, submission_date, old in self.values_list(
+                'pk', 'score', 'submission_date', 'hot_score'
+            )
+            if (new := hot_score(score, submission_date)) != old
+        ]
+        if not ideas:
+            return 0
+        self.bulk_update(ideas, ['hot_score', 'updated_at'])
+        bump_feed_generation()
+        return len(ideas)
+
+    def set_status(self, status, changed_by=None):
+        """Move every idea in the queryset to ``status``, recording who did it.
+
+        However many ideas change, this runs one SELECT for their current
+        status, one ``UPDATE ... WHERE id IN (...)``, one bulk INSERT of
+        ``IdeaStatusChange`` rows and one INSERT queuing the rollup update.
+        Returns the number of ideas changed.
+        """
+        from .rollups import defer, status_changes
+
+        using = router.db_for_write(self.model)
+        now = timezone.now()
+        with transaction.atomic(using=using):
+            changed = list(
+                self.using(using)
+                .exclude(status=status)
+                .select_for_update()
+                .order_by()
+                .values_list('pk', 'status', 'category_id')
+            )
+            if not changed:
+                return 0
+            Idea.objects.using(using).filter(pk__in=[pk for pk, _, _ in changed]).update(
+                status=status, updated_at=now
+            )
+            IdeaStatusChange.objects.using(using).bulk_create(
+                IdeaStatusChange(
+                    idea_id=pk,
+                    changed_by=changed_by,
+                    old_status=old_status,
+                    new_status=status,
+                    changed_at=now,
+                )
+                for pk, old_status, _ in changed
+            )
+            defer(
+                status_changes([(category_id, old_status) for _, old_status, category_id in changed], status),
+                using,
+            )
+            bump_feed_generation()
+        return len(changed)
+
+
 class Idea(models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pending'),
@@ -29,24 +153,159 @@ class Idea(models.Model):
     submitter = models.ForeignKey(User, on_delete=models.CASCADE, related_name='submitted_ideas')
     submission_date = models.DateTimeField(default=timezone.now)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    # Key of the idea in the system it was imported from; ``import_data``
+    # upserts on it.
+    external_id = models.CharField(max_length=100, unique=True, null=True, blank=True, editable=False)
+
+    # Denormalized counters, maintained by the vote/comment views and rebuilt
+    # by the ``recompute_idea_counters`` management command.
+    upvotes = models.PositiveIntegerField(default=0)
+    downvotes = models.PositiveIntegerField(default=0)
+    score = models.IntegerField(default=0)
+    comment_total = models.PositiveIntegerField(default=0)
+    # Changes with every edit, vote or comment; cached fragments are keyed on it.
+    updated_at = models.DateTimeField(default=timezone.now)
+    # hot_score(score, submission_date); kept current on save and by votes,
+    # rebuilt by the ``refresh_hot_scores`` management command.
+    hot_score = models.FloatField(default=0)
+
+    objects = IdeaQuerySet.as_manager()
 
     class Meta:
-        ordering = ['-submission_date']
+        ordering = ['-submission_date', '-id']
+        indexes = [
+            # Keyset pagination seeks on (submission_date, id) under every
+            # filter combination used by the feed, My Ideas and review pages.
+            models.Index(fields=['-submission_date', '-id'], name='idea_recent_idx'),
+            models.Index(fields=['status', '-submission_date', '-id'], name='idea_status_recent_idx'),
+            models.Index(fields=['category', '-submission_date', '-id'], name='idea_category_recent_idx'),
+            models.Index(
+                fields=['category', 'status', '-submission_date', '-id'],
+                name='idea_cat_status_recent_idx',
+            ),
+            models.Index(fields=['submitter', '-submission_date', '-id'], name='idea_submitter_recent_idx'),
+            # The review dashboard's default queue. Far smaller than the status
+            # index once most ideas have been decided; filters on other
+            # statuses (and on status alone) use idea_status_recent_idx.
+            models.Index(
+                fields=['-submission_date', '-id'],
+                condition=models.Q(status='pending'),
+                name='idea_pending_recent_idx',
+            ),
+            # The feed's "hot" and "top" sorts.
+            models.Index(fields=['-hot_score', '-id'], name='idea_hot_idx'),
+            models.Index(fields=['-score', '-id'], name='idea_top_idx'),
+            # "Top" over the last day or week: the window's ideas are found by
+            # date and sorted by score from this index alone.
+            models.Index(fields=['submission_date', 'score', 'id'], name='idea_top_window_idx'),
+            # Prefix search on titles in the admin. The operator class lets
+            # PostgreSQL use it for LIKE 'term%' under any collation; other
+            # backends ignore it.
+            models.Index(fields=['title'], name='idea_title_idx', opclasses=['varchar_pattern_ops']),
+        ]
 
     def __str__(self):
         return self.title
 
     def upvote_count(self):
-        return self.votes.filter(vote_type='upvote').count()
+        return self.upvotes
 
     def downvote_count(self):
-        return self.votes.filter(vote_type='downvote').count()
+        return self.downvotes
 
     def vote_score(self):
-        return self.upvote_count() - self.downvote_count()
+        return self.score
 
     def comment_count(self):
-        return self.comments.count()
+        return self.comment_total
+
+    @staticmethod
+    def vote_counter_deltas(removed=None, added=None):
+        """Return the counter changes for moving one vote from ``removed`` to ``added``."""
+        deltas = {}
+        for vote_type, sign in ((removed, -1), (added, 1)):
+            if vote_type is None:
+                continue
+            field = Vote.COUNTER_FIELDS[vote_type]
+            deltas[field] = deltas.get(field, 0) + sign
+            deltas['score'] = deltas.get('score', 0) + sign * Vote.SCORE_WEIGHTS[vote_type]
+        return {field: delta for field, delta in deltas.items() if delta}
+
+    @staticmethod
+    def vote_counter_updates(removed=None, added=None):
+        """Return ``update()`` kwargs moving one vote from ``removed`` to ``added``."""
+        deltas = Idea.vote_counter_deltas(removed, added)
+        return {field: F(field) + delta for field, delta in deltas.items()}
+
+
+class IdeaStatusChange(models.Model):
+    """Audit trail of status changes, written by ``IdeaQuerySet.set_status``."""
+
+    idea = models.ForeignKey(Idea, on_delete=models.CASCADE, related_name='status_changes')
+    changed_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name='status_changes'
+    )
+    old_status = models.CharField(max_length=20, choices=Idea.STATUS_CHOICES)
+    new_status = models.CharField(max_length=20, choices=Idea.STATUS_CHOICES)
+    changed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-changed_at', '-id']
+
+    def __str__(self):
+        return f"{self.idea_id}: {self.old_status} -> {self.new_status}"
+
+
+# Rollups: pre-aggregated totals behind the stats page, kept current by
+# ``ideas.rollups`` and rebuilt by the ``rebuild_rollups`` management command.
+# Keys are never NULL so upserts can target them; ideas without a category
+# use ``UNCATEGORIZED``.
+UNCATEGORIZED = 0
+
+
+class CategoryDailyRollup(models.Model):
+    day = models.DateField()
+    category_pk = models.IntegerField()
+    # Every vote and comment in a category updates that day's row; writers
+    # spread over a few shards so they don't queue on one row lock.
+    shard = models.PositiveSmallIntegerField(default=0)
+    ideas = models.IntegerField(default=0, db_default=0)
+    upvotes = models.IntegerField(default=0, db_default=0)
+    downvotes = models.IntegerField(default=0, db_default=0)
+    comments = models.IntegerField(default=0, db_default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['day', 'category_pk', 'shard'], name='category_daily_rollup_key'
+            ),
+        ]
+
+
+class UserDailyRollup(models.Model):
+    day = models.DateField()
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    ideas = models.IntegerField(default=0, db_default=0)
+    votes = models.IntegerField(default=0, db_default=0)
+    comments = models.IntegerField(default=0, db_default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'user'], name='user_daily_rollup_key'),
+        ]
+
+
+class CategoryStatusRollup(models.Model):
+    """Current number of ideas per category and status."""
+
+    category_pk = models.IntegerField()
+    status = models.CharField(max_length=20, choices=Idea.STATUS_CHOICES)
+    ideas = models.IntegerField(default=0, db_default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['category_pk', 'status'], name='category_status_rollup_key'),
+        ]
 
 
 class Vote(models.Model):
@@ -54,6 +313,8 @@ class Vote(models.Model):
         ('upvote', 'Upvote'),
         ('downvote', 'Downvote'),
     ]
+    COUNTER_FIELDS = {'upvote': 'upvotes', 'downvote': 'downvotes'}
+    SCORE_WEIGHTS = {'upvote': 1, 'downvote': -1}
 
     idea = models.ForeignKey(Idea, on_delete=models.CASCADE, related_name='votes')
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='votes')
@@ -63,11 +324,56 @@ class Vote(models.Model):
     class Meta:
         unique_together = ('idea', 'user')  # One vote per user per idea
         ordering = ['-voted_at']
+        indexes = [
+            # Per-idea vote tallies (recompute_idea_counters, rebuild_rollups)
+            # are counted from the index alone.
+            models.Index(fields=['idea', 'vote_type'], name='vote_idea_type_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.vote_type} on {self.idea.title}"
 
 
+class CommentQuerySet(models.QuerySet):
+    THREAD_SQL = (
+        'WITH RECURSIVE thread(id) AS ('
+        'SELECT id FROM ('
+        'SELECT id FROM ideas_comment WHERE idea_id = %s AND parent_comment_id IS NULL '
+        'ORDER BY timestamp, id LIMIT %s OFFSET %s'
+        ') AS roots '
+        'UNION ALL '
+        'SELECT reply.id FROM ideas_comment reply JOIN thread ON reply.parent_comment_id = thread.id'
+        ') SELECT id FROM thread'
+    )
+
+    def threads(self, idea, page=1, per_page=None):
+        """Return ``(roots, has_next)`` for one page of an idea's top-level threads.
+
+        The page's roots and all of their replies, at any depth, are loaded in a
+        single query using a recursive CTE; every comment gets a ``children``
+        list in timestamp order.
+        """
+        per_page = per_page or getattr(settings, 'IDEAS_COMMENT_THREADS_PER_PAGE', 50)
+        # One extra root tells us whether another page exists.
+        thread_ids = RawSQL(self.THREAD_SQL, (idea.pk, per_page + 1, (page - 1) * per_page))
+        comments = list(
+            self.filter(idea=idea, pk__in=thread_ids)
+            .select_related('user')
+            .order_by('timestamp', 'id')
+        )
+        by_id = {comment.pk: comment for comment in comments}
+        roots = []
+        for comment in comments:
+            comment.children = []
+        for comment in comments:
+            parent = by_id.get(comment.parent_comment_id)
+            if parent is None:
+                roots.append(comment)
+            else:
+                parent.children.append(comment)
+        return roots[:per_page], len(roots) > per_page
+
+
 class Comment(models.Model):
     idea = models.ForeignKey(Idea, on_delete=models.CASCADE, related_name='comments')
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='comments')
@@ -75,14 +381,22 @@ class Comment(models.Model):
     timestamp = models.DateTimeField(auto_now_add=True)
     parent_comment = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name='replies')
 
+    objects = CommentQuerySet.as_manager()
+
     class Meta:
         ordering = ['timestamp']
+        indexes = [
+            # A page of an idea's top-level threads, in order.
+            models.Index(
+                fields=['idea', 'parent_comment', 'timestamp', 'id'], name='comment_thread_idx'
+            ),
+        ]
 
     def __str__(self):
         return f"Comment by {self.user.username} on {self.idea.title}"
 
     def is_reply(self):
-        return self.parent_comment is not None
+        return self.parent_comment_id is not None
 
 
 class UserProfile(models.Model):
@@ -94,6 +408,7 @@ class UserProfile(models.Model):
         (ROLE_REVIEWER, 'Reviewer'),
         (ROLE_ADMIN, 'Administrator'),
     ]
+    REVIEW_ROLES = {ROLE_REVIEWER, ROLE_ADMIN}
 
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
     role = models.CharField(max_length=20, choices=ROLE_CHOICES, default=ROLE_SUBMITTER)
@@ -106,4 +421,30 @@ class UserProfile(models.Model):
 
     @property
     def can_review(self):
-        return self.role in {self.ROLE_REVIEWER, self.ROLE_ADMIN} or self.user.is_staff
\ No newline at end of file
+        return self.role in self.REVIEW_ROLES or self.user.is_staff
+
+
+class Task(models.Model):
+    """Work deferred from a write, run by the ``run_tasks`` worker (see ``ideas.tasks``)."""
+
+    name = models.CharField(max_length=100)
+    args = models.JSONField(default=dict)
+    created_at = models.DateTimeField(default=timezone.now)
+    # Not run before this; pushed back after each failed attempt.
+    run_after = models.DateTimeField(default=timezone.now)
+    # Claimed by a worker until then; a worker that dies loses its claim.
+    locked_until = models.DateTimeField(null=True, blank=True)
+    claim = models.UUIDField(null=True, blank=True, editable=False)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # Gave up after IDEAS_TASK_MAX_ATTEMPTS; kept for inspection.
+    failed = models.BooleanField(default=False)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            # The worker's poll for due tasks.
+            models.Index(fields=['failed', 'run_after', 'id'], name='task_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk}"
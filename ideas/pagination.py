@@ -0,0 +1,194 @@
+import base64
+import binascii
+import datetime
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Max, Q
+from django.http import QueryDict
+from django.utils.functional import cached_property
+
+DEFAULT_PAGE_SIZE = 20
+DEFAULT_ADMIN_COUNT_LIMIT = 10_000
+
+
+def page_size():
+    return getattr(settings, 'IDEAS_PAGE_SIZE', DEFAULT_PAGE_SIZE)
+
+
+def encode_cursor(values):
+    payload = [
+        value.isoformat() if isinstance(value, (datetime.date, datetime.datetime)) else value
+        for value in values
+    ]
+    raw = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token, length):
+    """Return the key values stored in ``token``, or None if it is not valid."""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        values = json.loads(raw)
+    except (binascii.Error, ValueError):
+        return None
+    if not isinstance(values, list) or len(values) != length:
+        return None
+    return values
+
+
+class KeysetPage:
+    def __init__(self, object_list, next_cursor, cursor, params=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.cursor = cursor
+        self.params = params
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.cursor is not None
+
+    @property
+    def next_querystring(self):
+        query = self.params.copy() if self.params is not None else QueryDict(mutable=True)
+        query['after'] = self.next_cursor
+        return query.urlencode()
+
+    @property
+    def first_querystring(self):
+        query = self.params.copy() if self.params is not None else QueryDict(mutable=True)
+        query.pop('after', None)
+        return query.urlencode()
+
+
+class KeysetPaginator:
+    """Paginate a queryset by seeking past the last row of the previous page.
+
+    ``keys`` are the ordering columns, all descending, and must end in a unique
+    column so the ordering is total. Each page is a single indexed range scan
+    instead of an OFFSET, so deep pages cost the same as the first one.
+
+    When no index reads the rows in order and a filtered range has to be
+    sorted instead, ``late_rows`` first finds the page's primary keys, so
+    only narrow index entries are sorted, then fetches those rows.
+    """
+
+    def __init__(self, queryset, keys=('submission_date', 'id'), per_page=None, late_rows=False):
+        self.queryset = queryset.order_by(*[f'-{key}' for key in keys])
+        self.keys = keys
+        self.per_page = per_page or page_size()
+        self.late_rows = late_rows
+
+    def seek_filter(self, values):
+        condition = Q()
+        for position in reversed(range(len(self.keys))):
+            equal = {key: value for key, value in zip(self.keys[:position], values)}
+            before = Q(**{f'{self.keys[position]}__lt': values[position]}, **equal)
+            condition = before | condition if condition else before
+        return condition
+
+    def key_field(self, key):
+        annotation = self.queryset.query.annotations.get(key)
+        if annotation is not None:
+            return annotation.output_field
+        return self.queryset.model._meta.get_field(key)
+
+    def clean(self, values):
+        """Convert decoded cursor values to the keys' types, or None if they don't fit.
+
+        Cursors come from the query string, so they may be tampered with or
+        belong to another sort.
+        """
+        cleaned = []
+        try:
+            for key, value in zip(self.keys, values):
+                field = self.key_field(key)
+                value = field.to_python(value)
+                # Catches integers out of the database's range.
+                field.run_validators(value)
+                cleaned.append(value)
+        except (ValidationError, TypeError, ValueError, OverflowError):
+            return None
+        return None if None in cleaned else cleaned
+
+    def page(self, cursor=None, params=None):
+        values = decode_cursor(cursor, len(self.keys))
+        if values is not None:
+            values = self.clean(values)
+        queryset = self.queryset
+        if values is not None:
+            queryset = queryset.filter(self.seek_filter(values))
+        else:
+            cursor = None
+        if self.late_rows:
+            ids = list(queryset.values_list('pk', flat=True)[: self.per_page + 1])
+            queryset = queryset.filter(pk__in=ids)
+        rows = list(queryset[: self.per_page + 1])
+        next_cursor = None
+        if len(rows) > self.per_page:
+            rows = rows[: self.per_page]
+            last = rows[-1]
+            next_cursor = encode_cursor([getattr(last, key) for key in self.keys])
+        return KeysetPage(rows, next_cursor, cursor, params)
+
+
+def paginate(request, queryset, keys=('submission_date', 'id'), late_rows=False):
+    """Return the keyset page of ``queryset`` selected by the ``?after=`` token."""
+    paginator = KeysetPaginator(queryset, keys, late_rows=late_rows)
+    return paginator.page(request.GET.get('after'), request.GET)
+
+
+def estimated_count(queryset):
+    """Roughly how many rows the model's table has, without a full COUNT(*).
+
+    Uses the planner's statistics on PostgreSQL and the highest primary key
+    elsewhere. Returns None when there is no estimate yet.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples FROM pg_class WHERE oid = %s::regclass',
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        # -1 until the table is first vacuumed or analyzed.
+        return int(row[0]) if row and row[0] >= 0 else None
+    return queryset.model._default_manager.using(queryset.db).aggregate(n=Max('pk'))['n'] or 0
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator for admin changelists over tables too large to COUNT(*).
+
+    An unfiltered list reports ``estimated_count()`` once that exceeds
+    ``IDEAS_ADMIN_COUNT_LIMIT``; a filtered list stops counting at that many
+    rows, so its later pages are not linked.
+    """
+
+    @cached_property
+    def count(self):
+        limit = getattr(settings, 'IDEAS_ADMIN_COUNT_LIMIT', DEFAULT_ADMIN_COUNT_LIMIT)
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimated_count(queryset)
+            if estimate is not None and estimate > limit:
+                return estimate
+        return queryset.order_by()[:limit].count()
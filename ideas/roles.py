@@ -0,0 +1,76 @@
+import time
+import uuid
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import UserProfile
+
+Role = namedtuple('Role', ['name', 'can_review'])
+
+ANONYMOUS_ROLE = Role(None, False)
+SESSION_KEY = '_ideas_role'
+
+
+def _version_key(user_id):
+    return f'ideas:role-version:{user_id}'
+
+
+def role_version(user_id):
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        # A fresh token (rather than a fixed default) makes sessions re-read
+        # their role after the cache has been cleared.
+        cache.add(key, uuid.uuid4().hex, None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate_role(user_id):
+    """Make every session of ``user_id`` re-read its role after this transaction."""
+    transaction.on_commit(lambda: cache.set(_version_key(user_id), uuid.uuid4().hex, None))
+
+
+def _load_role_name(user):
+    name = UserProfile.objects.filter(user_id=user.pk).values_list('role', flat=True).first()
+    if name is None and user.is_staff:
+        name = UserProfile.ROLE_ADMIN
+    return name
+
+
+def get_role(request):
+    """Return the signed-in user's :class:`Role` without querying on most requests.
+
+    The role name is kept in the session next to the version token it was
+    read under; the profile is only queried again when that token changes,
+    or ``IDEAS_ROLE_MAX_AGE`` seconds after it was read, since the token is
+    only shared between workers by a shared cache. The result is also
+    memoized on the request.
+    """
+    user = request.user
+    if not user.is_authenticated:
+        return ANONYMOUS_ROLE
+    role = getattr(request, '_ideas_role', None)
+    if role is not None:
+        return role
+
+    version = role_version(user.pk)
+    now = time.time()
+    stored = request.session.get(SESSION_KEY)
+    if (
+        stored
+        and stored.get('user') == user.pk
+        and stored.get('version') == version
+        and now - stored.get('read_at', 0) < settings.IDEAS_ROLE_MAX_AGE
+    ):
+        name = stored['role']
+    else:
+        name = _load_role_name(user)
+        request.session[SESSION_KEY] = {'user': user.pk, 'role': name, 'version': version, 'read_at': now}
+
+    role = Role(name, name in UserProfile.REVIEW_ROLES or user.is_staff)
+    request._ideas_role = role
+    return role
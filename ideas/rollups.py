@@ -0,0 +1,265 @@
+"""The rollup tables behind the stats page: keeping them current and reading them.
+
+The write paths for ideas, votes and comments add their deltas here as they
+happen, with one upsert per table, so the stats page reads a bounded number
+of pre-aggregated rows however long the history is. Vote and comment
+changes count on the day they happen, under the idea's category at the
+time: removing yesterday's vote today subtracts from today. Like the idea
+counters, rollups miss changes made outside those paths (e.g. deletions in
+the admin); ``rebuild_rollups`` recomputes them from the source rows,
+counting each vote and comment on the day it was made.
+
+Changes are ``(table, key, field, delta)`` tuples. Votes apply theirs at
+once; ideas, comments and status changes ``defer`` them to an
+``update_rollups`` task (see ``ideas.tasks``), and the worker merges a
+batch of those into one upsert per table. The stats page therefore lags
+those writes by as long as the worker takes to get to them.
+"""
+
+import datetime
+import random
+from collections import Counter, defaultdict
+
+from django.db import IntegrityError, connections, router, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .models import (
+    UNCATEGORIZED,
+    Category,
+    CategoryDailyRollup,
+    CategoryStatusRollup,
+    Idea,
+    UserDailyRollup,
+)
+from .tasks import enqueue, task
+
+# Backends that support INSERT ... ON CONFLICT ... DO UPDATE.
+UPSERT_VENDORS = {'postgresql', 'sqlite'}
+
+CATEGORY_DAY = ('day', 'category_pk', 'shard')
+# Shards of each CategoryDailyRollup row; readers sum over them.
+CATEGORY_DAY_SHARDS = 8
+USER_DAY = ('day', 'user_id')
+CATEGORY_STATUS = ('category_pk', 'status')
+TABLES = {
+    'category_day': (CategoryDailyRollup, CATEGORY_DAY),
+    'user_day': (UserDailyRollup, USER_DAY),
+    'category_status': (CategoryStatusRollup, CATEGORY_STATUS),
+}
+
+
+def category_key(category_id):
+    return category_id or UNCATEGORIZED
+
+
+def category_day(day, category_id):
+    return day, category_key(category_id), random.randrange(CATEGORY_DAY_SHARDS)
+
+
+def add(model, keys, rows, using=None):
+    """Add deltas to rollup rows, creating the rows that don't exist yet.
+
+    ``rows`` maps tuples of ``keys`` values to ``{field: delta}``.
+    """
+    rows = {
+        key: {field: delta for field, delta in deltas.items() if delta}
+        for key, deltas in rows.items()
+    }
+    rows = {key: deltas for key, deltas in rows.items() if deltas}
+    if not rows:
+        return
+    using = using or router.db_for_write(model)
+    connection = connections[using]
+    if connection.vendor in UPSERT_VENDORS:
+        _upsert(connection, model, keys, rows)
+        return
+    for key, deltas in rows.items():
+        _increment(using, model, dict(zip(keys, key)), deltas)
+
+
+def _upsert(connection, model, keys, rows):
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    fields = sorted({field for deltas in rows.values() for field in deltas})
+    key_columns = [quote(model._meta.get_field(key).column) for key in keys]
+    columns = key_columns + [quote(field) for field in fields]
+    values = ', '.join(['(' + ', '.join(['%s'] * len(columns)) + ')'] * len(rows))
+    sql = (
+        f'INSERT INTO {table} ({", ".join(columns)}) VALUES {values} '
+        f'ON CONFLICT ({", ".join(key_columns)}) DO UPDATE SET '
+        + ', '.join(f'{column} = {table}.{column} + excluded.{column}' for column in columns[len(keys):])
+    )
+    params = []
+    for key, deltas in rows.items():
+        params += [
+            connection.ops.adapt_datefield_value(value) if isinstance(value, datetime.date) else value
+            for value in key
+        ]
+        params += [deltas.get(field, 0) for field in fields]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def _increment(using, model, keys, deltas):
+    """Fallback for other backends: update the row, or create it if missing."""
+    rollups = model.objects.using(using).filter(**keys)
+    updates = {field: F(field) + delta for field, delta in deltas.items()}
+    if rollups.update(**updates):
+        return
+    try:
+        with transaction.atomic(using=using):
+            model.objects.using(using).create(**keys, **deltas)
+    except IntegrityError:  # created concurrently
+        rollups.update(**updates)
+
+
+def apply(changes, using=None):
+    """Add ``changes`` to the rollup tables, with one upsert per table."""
+    rows = defaultdict(lambda: defaultdict(Counter))
+    for table, key, field, delta in changes:
+        rows[table][tuple(key)][field] += delta
+    for table, table_rows in rows.items():
+        model, keys = TABLES[table]
+        add(model, keys, table_rows, using)
+
+
+def defer(changes, using=None):
+    """Have the task worker ``apply`` ``changes`` after this transaction commits."""
+    changes = [
+        (table, [v.isoformat() if isinstance(v, datetime.date) else v for v in key], field, delta)
+        for table, key, field, delta in changes
+    ]
+    if changes:
+        enqueue('update_rollups', using=using, changes=changes)
+
+
+@task('update_rollups', batched=True)
+def update_rollups(batch):
+    def decode(table, key):
+        keys = TABLES[table][1]
+        return tuple(
+            datetime.date.fromisoformat(value) if name == 'day' else value
+            for name, value in zip(keys, key)
+        )
+
+    apply(
+        (table, decode(table, key), field, delta)
+        for args in batch
+        for table, key, field, delta in args['changes']
+    )
+
+
+def idea_changes(idea):
+    """Count a newly submitted idea."""
+    day = timezone.localdate(idea.submission_date)
+    yield 'category_day', category_day(day, idea.category_id), 'ideas', 1
+    yield 'user_day', (day, idea.submitter_id), 'ideas', 1
+    yield 'category_status', (category_key(idea.category_id), idea.status), 'ideas', 1
+
+
+def move_changes(idea, old_category_id):
+    """Move an idea's counts from ``old_category_id`` to its current category."""
+    day = timezone.localdate(idea.submission_date)
+    old, new = category_key(old_category_id), category_key(idea.category_id)
+    if old == new:
+        return
+    yield 'category_day', category_day(day, old), 'ideas', -1
+    yield 'category_day', category_day(day, new), 'ideas', 1
+    yield 'category_status', (old, idea.status), 'ideas', -1
+    yield 'category_status', (new, idea.status), 'ideas', 1
+
+
+def status_changes(changes, status):
+    """Move ideas to ``status``; ``changes`` holds ``(category_id, old_status)`` per idea."""
+    totals = Counter()
+    for category_id, old_status in changes:
+        category = category_key(category_id)
+        totals[category, old_status] -= 1
+        totals[category, status] += 1
+    for key, n in totals.items():
+        yield 'category_status', key, 'ideas', n
+
+
+def vote_changes(category_id, user_id, removed=None, added=None):
+    """Count one vote moving from ``removed`` to ``added`` (either may be None)."""
+    day = timezone.localdate()
+    key = category_day(day, category_id)
+    for field, delta in Idea.vote_counter_deltas(removed, added).items():
+        if field != 'score':
+            yield 'category_day', key, field, delta
+    yield 'user_day', (day, user_id), 'votes', (added is not None) - (removed is not None)
+
+
+def comment_changes(category_id, user_id):
+    day = timezone.localdate()
+    yield 'category_day', category_day(day, category_id), 'comments', 1
+    yield 'user_day', (day, user_id), 'comments', 1
+
+
+def category_names():
+    """Return a function naming a rollup's ``category_pk``."""
+    names = dict(Category.objects.values_list('pk', 'name'))
+    # Ideas of a deleted category become uncategorized.
+    return lambda category_pk: names.get(category_pk, 'Uncategorized')
+
+
+def weekly_activity(weeks, name, today=None):
+    """Activity in each of the last ``weeks`` weeks, read from the daily rollups.
+
+    Returns ``(week_starts, categories, totals)``: ``categories`` is a list of
+    ``(name, ideas per week)`` with the busiest category first and ``totals``
+    a list of ``{field: total}`` per week.
+    """
+    today = today or timezone.localdate()
+    first = today - datetime.timedelta(days=today.weekday(), weeks=weeks - 1)
+    week_starts = [first + datetime.timedelta(weeks=n) for n in range(weeks)]
+    fields = ['ideas', 'upvotes', 'downvotes', 'comments']
+    ideas = {}
+    totals = [Counter() for _ in week_starts]
+    for day, category_pk, *counts in CategoryDailyRollup.objects.filter(day__range=(first, today)).values_list(
+        'day', 'category_pk', *fields
+    ):
+        week = (day - first).days // 7
+        ideas.setdefault(name(category_pk), [0] * weeks)[week] += counts[0]
+        totals[week].update(dict(zip(fields, counts)))
+    categories = sorted(ideas.items(), key=lambda item: (-sum(item[1]), item[0]))
+    return week_starts, categories, [{field: total[field] for field in fields} for total in totals]
+
+
+def status_breakdown(name):
+    """Current ideas per status for each category, with its approval rate.
+
+    The approval rate is the share of decided ideas (approved, implemented
+    or rejected) that were not rejected.
+    """
+    rows = {}
+    for category_pk, status, ideas in CategoryStatusRollup.objects.values_list(
+        'category_pk', 'status', 'ideas'
+    ):
+        rows.setdefault(name(category_pk), Counter())[status] += ideas
+    breakdown = []
+    for category, counts in sorted(rows.items()):
+        decided = counts['approved'] + counts['implemented'] + counts['rejected']
+        breakdown.append(
+            {
+                'category': category,
+                'counts': [counts[status] for status, _ in Idea.STATUS_CHOICES],
+                'total': sum(counts.values()),
+                'approval_rate': (decided - counts['rejected']) / decided if decided else None,
+            }
+        )
+    return breakdown
+
+
+def top_users(field, days, limit=10, today=None):
+    """Usernames and totals of the users with the highest ``field`` over the last ``days`` days."""
+    since = (today or timezone.localdate()) - datetime.timedelta(days=days - 1)
+    return list(
+        UserDailyRollup.objects.filter(day__gte=since)
+        .values('user__username')
+        .annotate(total=Sum(field))
+        .filter(total__gt=0)
+        .order_by('-total', 'user__username')
+        .values_list('user__username', 'total')[:limit]
+    )
@@ -0,0 +1,62 @@
+import contextlib
+import contextvars
+import random
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+_pinned = contextvars.ContextVar('ideas_primary_pinned', default=False)
+
+# A session is written at login and read on the very next request; a
+# replica that hasn't caught up would log the user out.
+PRIMARY_ONLY_APPS = {'sessions'}
+
+
+def read_replicas():
+    return getattr(settings, 'IDEAS_READ_REPLICAS', [])
+
+
+@contextlib.contextmanager
+def use_primary():
+    """Send every read in the block to the primary database."""
+    token = _pinned.set(True)
+    try:
+        yield
+    finally:
+        _pinned.reset(token)
+
+
+class PrimaryReplicaRouter:
+    """Write to the primary and spread reads over ``IDEAS_READ_REPLICAS``.
+
+    Reads stay on the primary inside ``use_primary()`` (which
+    ``PrimaryPinningMiddleware`` applies to writes and to a user's requests
+    shortly after one) and inside a transaction, which may have written
+    rows a replica hasn't seen yet.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = read_replicas()
+        if (
+            not replicas
+            or _pinned.get()
+            or model._meta.app_label in PRIMARY_ONLY_APPS
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *read_replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema from the primary.
+        if db in read_replicas():
+            return False
+        return None
@@ -0,0 +1,186 @@
+import re
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+MAX_TERMS = 8
+# Shorter terms only match whole words: expanding a one- or two-letter prefix
+# would match (and rank) most of the corpus.
+MIN_PREFIX_LENGTH = 3
+TERM_RE = re.compile(r'\w+')
+
+
+def search_terms(query):
+    return TERM_RE.findall(query.lower())[:MAX_TERMS]
+
+
+class SearchBackend:
+    """Filters an Idea queryset down to the ideas matching a search query.
+
+    Ranked backends annotate each row with ``search_rank`` (higher is better)
+    so callers can paginate on ``(search_rank, id)`` instead of recency.
+    """
+
+    ranked = False
+    rank_field = 'search_rank'
+
+    def __init__(self, using=DEFAULT_DB_ALIAS):
+        self.connection = connections[using]
+
+    def search(self, queryset, query):
+        raise NotImplementedError
+
+    def install(self):
+        pass
+
+    def uninstall(self):
+        pass
+
+    def rebuild(self):
+        pass
+
+
+class IcontainsSearchBackend(SearchBackend):
+    def search(self, queryset, query):
+        return queryset.filter(Q(title__icontains=query) | Q(description__icontains=query))
+
+
+class SQLiteFTSSearchBackend(SearchBackend):
+    """FTS5 external-content index over ``ideas_idea``, synced by triggers."""
+
+    ranked = True
+    table = 'ideas_idea_fts'
+    source = 'ideas_idea'
+
+    def schema(self):
+        table, source = self.table, self.source
+        return [
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5("
+            f"title, description, content='{source}', content_rowid='id', "
+            f"tokenize='unicode61 remove_diacritics 2', prefix='3')",
+            f"CREATE TRIGGER IF NOT EXISTS {table}_ai AFTER INSERT ON {source} BEGIN "
+            f"INSERT INTO {table}(rowid, title, description) "
+            f"VALUES (new.id, new.title, new.description); END",
+            f"CREATE TRIGGER IF NOT EXISTS {table}_ad AFTER DELETE ON {source} BEGIN "
+            f"INSERT INTO {table}({table}, rowid, title, description) "
+            f"VALUES ('delete', old.id, old.title, old.description); END",
+            # Only text edits touch the index; counter and status updates don't.
+            f"CREATE TRIGGER IF NOT EXISTS {table}_au AFTER UPDATE OF title, description "
+            f"ON {source} BEGIN "
+            f"INSERT INTO {table}({table}, rowid, title, description) "
+            f"VALUES ('delete', old.id, old.title, old.description); "
+            f"INSERT INTO {table}(rowid, title, description) "
+            f"VALUES (new.id, new.title, new.description); END",
+        ]
+
+    def install(self):
+        with self.connection.cursor() as cursor:
+            for statement in self.schema():
+                cursor.execute(statement)
+
+    def uninstall(self):
+        with self.connection.cursor() as cursor:
+            for suffix in ('ai', 'ad', 'au'):
+                cursor.execute(f'DROP TRIGGER IF EXISTS {self.table}_{suffix}')
+            cursor.execute(f'DROP TABLE IF EXISTS {self.table}')
+
+    def rebuild(self):
+        self.install()
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {self.table}({self.table}) VALUES ('rebuild')")
+            cursor.execute(f"INSERT INTO {self.table}({self.table}) VALUES ('optimize')")
+
+    def search(self, queryset, query):
+        terms = search_terms(query)
+        if not terms:
+            return queryset.none().annotate(search_rank=Value(0.0, output_field=FloatField()))
+        match = ' '.join(
+            f'"{term}"*' if len(term) >= MIN_PREFIX_LENGTH else f'"{term}"' for term in terms
+        )
+        table, source = self.table, self.source
+        return queryset.filter(
+            RawSQL(
+                f'{source}.id IN (SELECT rowid FROM {table} WHERE {table} MATCH %s)',
+                (match,),
+                output_field=BooleanField(),
+            )
+        ).annotate(
+            # bm25() needs corpus statistics, so evaluating it per outer row is
+            # quadratic; materialize the scored matches once per statement.
+            search_rank=RawSQL(
+                f'WITH matches AS MATERIALIZED ('
+                f'SELECT rowid AS id, -bm25({table}, 4.0, 1.0) AS rank '
+                f'FROM {table} WHERE {table} MATCH %s) '
+                f'SELECT rank FROM matches WHERE matches.id = {source}.id',
+                (match,),
+                output_field=FloatField(),
+            )
+        )
+
+
+class PostgresSearchBackend(SearchBackend):
+    """``tsvector`` expression over title and description, backed by a GIN index."""
+
+    ranked = True
+    index = 'ideas_idea_search_idx'
+    source = 'ideas_idea'
+    config = 'english'
+    # Must match the indexed expression exactly for the planner to use it.
+    vector = (
+        f"(setweight(to_tsvector('{config}', coalesce(title, '')), 'A') || "
+        f"setweight(to_tsvector('{config}', coalesce(description, '')), 'B'))"
+    )
+
+    def install(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS {self.index} ON {self.source} USING GIN ({self.vector})'
+            )
+
+    def uninstall(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DROP INDEX IF EXISTS {self.index}')
+
+    def rebuild(self):
+        self.install()
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'REINDEX INDEX {self.index}')
+
+    def search(self, queryset, query):
+        terms = search_terms(query)
+        if not terms:
+            return queryset.none().annotate(search_rank=Value(0.0, output_field=FloatField()))
+        tsquery = ' & '.join(
+            f'{term}:*' if len(term) >= MIN_PREFIX_LENGTH else term for term in terms
+        )
+        return queryset.filter(
+            RawSQL(
+                f"{self.vector} @@ to_tsquery('{self.config}', %s)",
+                (tsquery,),
+                output_field=BooleanField(),
+            )
+        ).annotate(
+            search_rank=RawSQL(
+                f"ts_rank_cd({self.vector}, to_tsquery('{self.config}', %s))",
+                (tsquery,),
+                output_field=FloatField(),
+            )
+        )
+
+
+VENDOR_BACKENDS = {
+    'postgresql': PostgresSearchBackend,
+    'sqlite': SQLiteFTSSearchBackend,
+}
+
+
+def get_search_backend(using=DEFAULT_DB_ALIAS):
+    path = getattr(settings, 'IDEAS_SEARCH_BACKEND', None)
+    if path:
+        backend_class = import_string(path)
+    else:
+        backend_class = VENDOR_BACKENDS.get(connections[using].vendor, IcontainsSearchBackend)
+    return backend_class(using)
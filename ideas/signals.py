@@ -1,8 +1,12 @@
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
 from django.dispatch import receiver
+from django.utils import timezone
 
-from .models import UserProfile
+from .cache import bump_feed_generation, touch_ideas
+from .models import Category, Comment, Idea, UserProfile, Vote, hot_score
+from .roles import invalidate_role
+from .rollups import defer, idea_changes
 
 
 @receiver(post_save, sender=User)
@@ -12,3 +16,40 @@ def create_or_update_user_profile(sender, instance, created, **kwargs):
         profile.role = UserProfile.ROLE_ADMIN
         profile.save()
 
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def invalidate_user_role(sender, instance, **kwargs):
+    invalidate_role(instance.user_id)
+
+
+@receiver(pre_save, sender=Idea)
+def stamp_idea(sender, instance, **kwargs):
+    instance.updated_at = timezone.now()
+    instance.hot_score = hot_score(instance.score, instance.submission_date)
+
+
+@receiver(post_save, sender=Idea)
+@receiver(post_delete, sender=Idea)
+def invalidate_feed(sender, **kwargs):
+    bump_feed_generation()
+
+
+@receiver(post_save, sender=Idea)
+def count_new_idea(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        defer(idea_changes(instance))
+
+
+@receiver(post_save, sender=Vote)
+@receiver(post_delete, sender=Vote)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_idea(sender, instance, **kwargs):
+    touch_ideas(Idea.objects.filter(pk=instance.idea_id))
+
+
+@receiver(post_save, sender=Category)
+@receiver(pre_delete, sender=Category)  # before ideas.category is set to NULL
+def invalidate_category_ideas(sender, instance, **kwargs):
+    touch_ideas(Idea.objects.filter(category_id=instance.pk))
@@ -0,0 +1,145 @@
+"""A durable queue for the work a write can leave until after it commits.
+
+``enqueue`` adds a :class:`~ideas.models.Task` row inside the caller's
+transaction, so a task exists exactly when its write committed and the
+request pays for one INSERT instead of the work itself. The ``run_tasks``
+worker claims due tasks, runs them and deletes each one in the same
+transaction as its work, so a task's database changes happen once even if
+the worker dies halfway through a batch.
+
+Handlers are registered with :func:`task`. A batched handler receives the
+arguments of every claimed task of its name at once, so e.g. many rollup
+updates become one upsert per table; if a batch fails, its tasks are
+retried one by one to find the one at fault. A failing task is retried with
+exponential backoff and marked ``failed`` after ``IDEAS_TASK_MAX_ATTEMPTS``.
+"""
+
+import datetime
+import itertools
+import logging
+import traceback
+import uuid
+from collections import namedtuple
+
+from django.conf import settings
+from django.db import router, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+Handler = namedtuple('Handler', ['func', 'batched'])
+HANDLERS = {}
+
+
+def task(name, batched=False):
+    """Register the decorated function as the handler of tasks called ``name``.
+
+    It's called with a task's arguments as keywords or, when ``batched``,
+    with the list of several tasks' argument dicts.
+    """
+
+    def register(func):
+        HANDLERS[name] = Handler(func, batched)
+        return func
+
+    return register
+
+
+def enqueue(name, using=None, **args):
+    """Queue ``name`` to run with JSON-serializable ``args`` once this transaction commits."""
+    Task.objects.using(using or router.db_for_write(Task)).create(name=name, args=args)
+
+
+def due(now, using):
+    return (
+        Task.objects.using(using)
+        .filter(failed=False, run_after__lte=now)
+        .filter(Q(locked_until__isnull=True) | Q(locked_until__lt=now))
+    )
+
+
+def claim(limit, using=None):
+    """Claim up to ``limit`` due tasks, oldest first, for ``IDEAS_TASK_LEASE`` seconds.
+
+    Claims are conditional updates, so concurrent workers never get the same
+    task; PostgreSQL workers also skip each other's locked rows.
+    """
+    using = using or router.db_for_write(Task)
+    now = timezone.now()
+    locked_until = now + datetime.timedelta(seconds=settings.IDEAS_TASK_LEASE)
+    with transaction.atomic(using=using):
+        ids = list(
+            due(now, using)
+            .select_for_update(skip_locked=True)
+            .order_by('run_after', 'id')
+            .values_list('pk', flat=True)[:limit]
+        )
+        if not ids:
+            return []
+        token = uuid.uuid4()
+        due(now, using).filter(pk__in=ids).update(locked_until=locked_until, claim=token)
+        return list(Task.objects.using(using).filter(claim=token).order_by('id'))
+
+
+def units(tasks):
+    """Split claimed tasks into lists that run in one transaction each."""
+    for name, group in itertools.groupby(sorted(tasks, key=lambda t: (t.name, t.pk)), lambda t: t.name):
+        handler = HANDLERS.get(name)
+        if handler is not None and handler.batched:
+            yield list(group)
+        else:
+            yield from ([t] for t in group)
+
+
+def run(tasks, using=None):
+    """Run claimed tasks, all of one name; return how many succeeded."""
+    using = using or router.db_for_write(Task)
+    handler = HANDLERS.get(tasks[0].name)
+    try:
+        if handler is None:
+            raise LookupError(f'No handler for task {tasks[0].name!r}.')
+        with transaction.atomic(using=using):
+            if handler.batched:
+                handler.func([t.args for t in tasks])
+            else:
+                handler.func(**tasks[0].args)
+            Task.objects.using(using).filter(pk__in=[t.pk for t in tasks]).delete()
+        return len(tasks)
+    except Exception:
+        if len(tasks) > 1:
+            return sum(run([t], using) for t in tasks)
+        retry_later(tasks[0], traceback.format_exc(), using)
+        return 0
+
+
+def retry_later(failed_task, error, using):
+    attempts = failed_task.attempts + 1
+    gave_up = attempts >= settings.IDEAS_TASK_MAX_ATTEMPTS
+    delay = settings.IDEAS_TASK_RETRY_DELAY * 2 ** (attempts - 1)
+    Task.objects.using(using).filter(pk=failed_task.pk).update(
+        attempts=attempts,
+        failed=gave_up,
+        last_error=error,
+        locked_until=None,
+        run_after=timezone.now() + datetime.timedelta(seconds=delay),
+    )
+    logger.log(
+        logging.ERROR if gave_up else logging.WARNING,
+        'Task %s failed (attempt %d)%s:\n%s',
+        failed_task,
+        attempts,
+        '; giving up' if gave_up else '',
+        error,
+    )
+
+
+def run_due(batch_size=None, using=None):
+    """Run due tasks in this thread until none are left; return how many succeeded."""
+    batch_size = batch_size or settings.IDEAS_TASK_BATCH_SIZE
+    done = 0
+    while tasks := claim(batch_size, using):
+        done += sum(run(unit, using) for unit in units(tasks))
+    return done
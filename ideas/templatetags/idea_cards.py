@@ -0,0 +1,45 @@
+from django import template
+from django.core.cache import cache
+from django.template.loader import get_template
+from django.utils.html import json_script
+from django.utils.safestring import mark_safe
+
+from ideas.models import Vote
+
+register = template.Library()
+
+CARD_TEMPLATE = 'ideas/_idea_card.html'
+# Seconds a rendered card is kept; a new updated_at retires it sooner.
+CARD_CACHE_TIMEOUT = 3600
+# Element holding the viewer's votes on the page's ideas, read by vote.js.
+USER_VOTES_ID = 'ideas-user-votes'
+
+
+def card_cache_key(idea, signed_in):
+    return f'ideas:card:{idea.pk}:{idea.updated_at.timestamp()}:{int(signed_in)}'
+
+
+@register.simple_tag(takes_context=True)
+def idea_cards(context, ideas):
+    """Render the feed's idea cards, reusing each card until its idea changes.
+
+    Cached cards are fetched with one ``get_many`` and only the missing ones
+    are rendered. Cards differ only in whether the viewer is signed in; the
+    viewer's own votes follow as JSON, from one query, for vote.js to mark.
+    """
+    signed_in = context['user'].is_authenticated
+    keys = [card_cache_key(idea, signed_in) for idea in ideas]
+    cards = cache.get_many(keys)
+    missing = {}
+    card_template = None
+    for key, idea in zip(keys, ideas):
+        if key not in cards:
+            card_template = card_template or get_template(CARD_TEMPLATE)
+            cards[key] = missing[key] = card_template.render({'idea': idea, 'signed_in': signed_in})
+    if missing:
+        cache.set_many(missing, CARD_CACHE_TIMEOUT)
+    html = ''.join(cards[key] for key in keys)
+    if signed_in and ideas:
+        votes = Vote.objects.filter(user=context['user'], idea__in=[idea.pk for idea in ideas])
+        html += json_script(dict(votes.order_by().values_list('idea_id', 'vote_type')), USER_VOTES_ID)
+    return mark_safe(html)
@@ -0,0 +1,58 @@
+"""Test helpers for asserting per-view query budgets."""
+
+import contextlib
+import functools
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+@contextlib.contextmanager
+def query_budget(budget, using=DEFAULT_DB_ALIAS):
+    """Fail if the block runs more than ``budget`` queries."""
+    with CaptureQueriesContext(connections[using]) as captured:
+        yield captured
+    if len(captured) > budget:
+        statements = '\n'.join(
+            f'{n}. {query["sql"]}' for n, query in enumerate(captured.captured_queries, start=1)
+        )
+        raise QueryBudgetExceeded(
+            f'{len(captured)} queries executed, budget is {budget}:\n{statements}'
+        )
+
+
+def within_query_budget(budget, using=DEFAULT_DB_ALIAS):
+    """Decorator form of :func:`query_budget` for whole test methods."""
+
+    def decorator(test_method):
+        @functools.wraps(test_method)
+        def wrapper(*args, **kwargs):
+            with query_budget(budget, using):
+                return test_method(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+class QueryBudgetMixin:
+    """Check requests to named URLs against ``query_budgets``.
+
+    ``query_budgets`` maps URL names to the maximum number of queries one
+    request may run, so a new N+1 fails the test that owns that URL.
+    """
+
+    query_budgets = {}
+
+    def assertQueryBudget(self, url_name, args=(), method='get', data=None, budget=None, **extra):
+        if budget is None:
+            budget = self.query_budgets[url_name]
+        url = reverse(url_name, args=args)
+        with query_budget(budget):
+            response = getattr(self.client, method)(url, data or {}, **extra)
+        return response
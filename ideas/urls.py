@@ -9,10 +9,15 @@ urlpatterns = [
     path('ideas/<int:pk>/', views.idea_detail, name='idea_detail'),
     path('ideas/<int:pk>/edit/', views.edit_idea, name='edit_idea'),
     path('ideas/<int:pk>/status/', views.update_idea_status, name='update_idea_status'),
+    path('ideas/status/', views.bulk_update_idea_status, name='bulk_update_idea_status'),
     path('ideas/<int:pk>/vote/', views.vote, name='vote'),
+    path('api/ideas/<int:pk>/vote/', views.vote_api, name='vote_api'),
     path('ideas/<int:pk>/comment/', views.add_comment, name='add_comment'),
+    path('ideas/<int:pk>/events/', views.idea_events, name='idea_events'),
     path('my-ideas/', views.my_ideas, name='my_ideas'),
     path('review-dashboard/', views.review_dashboard, name='review_dashboard'),
+    path('review-dashboard/export/', views.export_ideas, name='export_ideas'),
+    path('stats/', views.stats, name='stats'),
     path('register/', views.register, name='register'),
     path(
         'login/',
@@ -1,85 +1,160 @@
+import datetime
+import math
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth import login
 from django.contrib.auth.decorators import login_required
-from django.db.models import Count, Q
+from django.db import transaction
+from django.db.models import F
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.template.defaultfilters import pluralize
+from django.utils import timezone
+from django.utils.http import url_has_allowed_host_and_scheme
 from django.views.decorators.http import require_POST
 
-from .forms import CommentForm, IdeaForm, IdeaStatusForm, RegistrationForm
-from .models import Category, Comment, Idea, UserProfile, Vote
-
-
-def user_can_review(user):
-    if not user.is_authenticated:
-        return False
-    if user.is_staff:
-        return True
-    try:
-        profile = user.profile
-    except UserProfile.DoesNotExist:
-        return False
-    return profile.can_review
-
-
+from .cache import cache_anonymous_page, feed_generation
+from .conditional import conditional_page, set_page_etag
+from .exports import CONTENT_TYPES, export_queryset, stream_export
+from .forms import BulkIdeaStatusForm, CommentForm, IdeaForm, IdeaStatusForm, RegistrationForm
+from .live import TooManyStreams, get_broker, idea_channel, idea_exists, publish_comment, stream
+from .models import Category, Comment, Idea, Vote
+from .pagination import paginate
+from .roles import get_role
+from .rollups import (
+    category_names,
+    comment_changes,
+    defer,
+    move_changes,
+    status_breakdown,
+    top_users,
+    weekly_activity,
+)
+from .search import get_search_backend
+from .voting import toggle_vote
+
+# Keyset pagination keys for each feed sort; each has a matching index.
+FEED_SORTS = {
+    'new': ('submission_date', 'id'),
+    'hot': ('hot_score', 'id'),
+    'top': ('score', 'id'),
+}
+# Windows shown on the stats page.
+STATS_WEEKS = 8
+STATS_TOP_USER_DAYS = 30
+TOP_PERIODS = {
+    'day': datetime.timedelta(days=1),
+    'week': datetime.timedelta(weeks=1),
+    'all': None,
+}
+# A windowed "top" feed changes as its window slides, without any write; its
+# ETag changes this often.
+TOP_WINDOW_SECONDS = 300
+
+
+def redirect_back(request, default):
+    """Redirect to the POSTed ``next`` URL if it stays on this site, else to ``default``."""
+    next_url = request.POST.get('next')
+    if next_url and url_has_allowed_host_and_scheme(
+        next_url, allowed_hosts={request.get_host()}, require_https=request.is_secure()
+    ):
+        return redirect(next_url)
+    return redirect(default)
+
+
+def feed_version(request):
+    if request.GET.get('sort') == 'top' and TOP_PERIODS.get(request.GET.get('period', 'week')):
+        return feed_generation(), int(time.time()) // TOP_WINDOW_SECONDS
+    return feed_generation()
+
+
+def idea_version(request, pk):
+    # Every edit, vote, comment and status change touches updated_at.
+    return Idea.objects.filter(pk=pk).order_by().values_list('updated_at', flat=True).first()
+
+
+@conditional_page(feed_version)
+@cache_anonymous_page
 def home(request):
-    ideas = (
-        Idea.objects.select_related('category', 'submitter')
-        .prefetch_related('votes', 'comments')
-        .annotate(
-            upvotes=Count('votes', filter=Q(votes__vote_type='upvote')),
-            downvotes=Count('votes', filter=Q(votes__vote_type='downvote')),
-            comment_total=Count('comments', distinct=True),
-        )
-    )
+    ideas = Idea.objects.for_feed()
 
     category_filter = request.GET.get('category')
     status_filter = request.GET.get('status')
     search_query = request.GET.get('q')
 
+    sort = request.GET.get('sort')
+    period = request.GET.get('period', 'week')
+
     if category_filter:
         ideas = ideas.filter(category__id=category_filter)
     if status_filter:
         ideas = ideas.filter(status=status_filter)
+    keys = FEED_SORTS['new']
     if search_query:
-        ideas = ideas.filter(
-            Q(title__icontains=search_query) | Q(description__icontains=search_query)
-        )
-
+        backend = get_search_backend(ideas.db)
+        ideas = backend.search(ideas, search_query)
+        if backend.ranked and sort not in FEED_SORTS:
+            keys = (backend.rank_field, 'id')
+    if sort in FEED_SORTS:
+        keys = FEED_SORTS[sort]
+    windowed = sort == 'top' and TOP_PERIODS.get(period) is not None
+    if windowed:
+        # Sorting by idea_top_idx would walk past every older idea, and most
+        # high scores are old. "+ 0" keeps the planner off it, so the date
+        # range is read from idea_top_window_idx and only the window sorted.
+        ideas = ideas.filter(submission_date__gte=timezone.now() - TOP_PERIODS[period])
+        ideas = ideas.annotate(window_score=F('score') + 0)
+        keys = ('window_score', 'id')
+
+    page = paginate(request, ideas, keys, late_rows=windowed)
     context = {
-        'ideas': ideas,
+        'ideas': page,
+        'page': page,
         'categories': Category.objects.all(),
+        'status_choices': Idea.STATUS_CHOICES,
         'selected_category': category_filter,
         'selected_status': status_filter,
         'search_query': search_query or '',
+        'selected_sort': sort if sort in FEED_SORTS else '',
+        'selected_period': period,
     }
     return render(request, 'ideas/home.html', context)
 
 
+@conditional_page(idea_version)
+@cache_anonymous_page
 def idea_detail(request, pk):
-    idea = get_object_or_404(
-        Idea.objects.select_related('category', 'submitter')
-        .prefetch_related('comments__user', 'comments__replies__user', 'votes'),
-        pk=pk,
-    )
+    idea = get_object_or_404(Idea.objects.select_related('category', 'submitter'), pk=pk)
     comment_form = CommentForm()
     user_vote = None
     if request.user.is_authenticated:
         user_vote = idea.votes.filter(user=request.user).first()
-    comments = (
-        idea.comments.filter(parent_comment__isnull=True)
-        .select_related('user')
-        .prefetch_related('replies__user')
-    )
-    return render(
+    try:
+        thread_page = max(int(request.GET.get('threads', 1)), 1)
+    except ValueError:
+        thread_page = 1
+    # Every thread has a comment, so no page past this one has any; the clamp
+    # also keeps the thread query's OFFSET within the database's integers.
+    per_page = settings.IDEAS_COMMENT_THREADS_PER_PAGE
+    thread_page = min(thread_page, max(math.ceil(idea.comment_total / per_page), 1))
+    comments, more_threads = Comment.objects.threads(idea, page=thread_page, per_page=per_page)
+    response = render(
         request,
         'ideas/idea_detail.html',
         {
             'idea': idea,
             'comment_form': comment_form,
             'comments': comments,
+            'thread_page': thread_page,
+            'more_threads': more_threads,
             'user_vote': user_vote,
         },
     )
+    set_page_etag(request, response, idea.updated_at)
+    return response
 
 
 @login_required
@@ -89,7 +164,9 @@ def submit_idea(request):
         if form.is_valid():
             idea = form.save(commit=False)
             idea.submitter = request.user
-            idea.save()
+            # The idea and the tasks its signals queue commit together.
+            with transaction.atomic():
+                idea.save()
             messages.success(request, 'Idea submitted successfully.')
             return redirect('idea_detail', pk=idea.pk)
     else:
@@ -100,10 +177,14 @@ def submit_idea(request):
 @login_required
 def edit_idea(request, pk):
     idea = get_object_or_404(Idea, pk=pk, submitter=request.user)
+    old_category_id = idea.category_id
     if request.method == 'POST':
         form = IdeaForm(request.POST, instance=idea)
         if form.is_valid():
-            form.save()
+            with transaction.atomic():
+                # Only the form's fields: the counters loaded above may be stale by now.
+                form.save(commit=False).save(update_fields=[*form.Meta.fields, 'updated_at'])
+                defer(move_changes(idea, old_category_id))
             messages.success(request, 'Idea updated successfully.')
             return redirect('idea_detail', pk=idea.pk)
     else:
@@ -114,25 +195,29 @@ def edit_idea(request, pk):
 @login_required
 def my_ideas(request):
     ideas = Idea.objects.filter(submitter=request.user).select_related('category')
-    return render(request, 'ideas/my_ideas.html', {'ideas': ideas})
+    page = paginate(request, ideas)
+    return render(request, 'ideas/my_ideas.html', {'ideas': page, 'page': page})
 
 
 @login_required
 def review_dashboard(request):
-    if not user_can_review(request.user):
+    if not get_role(request).can_review:
         messages.error(request, 'You do not have permission to review ideas.')
         return redirect('home')
 
     status_filter = request.GET.get('status') or 'pending'
-    ideas = Idea.objects.select_related('category', 'submitter')
+    ideas = Idea.objects.for_feed()
     if status_filter:
         ideas = ideas.filter(status=status_filter)
 
+    page = paginate(request, ideas)
     context = {
-        'ideas': ideas,
+        'ideas': page,
+        'page': page,
         'status_filter': status_filter,
         'status_choices': Idea.STATUS_CHOICES,
         'status_form': IdeaStatusForm(),
+        'bulk_form': BulkIdeaStatusForm(),
     }
     return render(request, 'ideas/review_dashboard.html', context)
 
@@ -140,30 +225,43 @@ def review_dashboard(request):
 @login_required
 @require_POST
 def vote(request, pk):
-    idea = get_object_or_404(Idea, pk=pk)
     vote_type = request.POST.get('vote_type')
 
     if vote_type not in dict(Vote.VOTE_CHOICES):
         messages.error(request, 'Invalid vote type.')
         return redirect('idea_detail', pk=pk)
 
-    vote, created = Vote.objects.get_or_create(
-        idea=idea,
-        user=request.user,
-        defaults={'vote_type': vote_type},
-    )
+    try:
+        result = toggle_vote(pk, request.user, vote_type)
+    except Idea.DoesNotExist:
+        raise Http404('No Idea matches the given query.')
 
-    if not created and vote.vote_type == vote_type:
-        vote.delete()
+    if result.removed:
         messages.info(request, 'Your vote has been removed.')
     else:
-        vote.vote_type = vote_type
-        vote.save()
         messages.success(request, 'Your vote has been recorded.')
 
     return redirect('idea_detail', pk=pk)
 
 
+@require_POST
+async def vote_api(request, pk):
+    """JSON variant of :func:`vote` for the in-page vote buttons."""
+    user = await request.auser()
+    if not user.is_authenticated:
+        return JsonResponse({'error': 'Login to vote.'}, status=401)
+
+    vote_type = request.POST.get('vote_type')
+    if vote_type not in dict(Vote.VOTE_CHOICES):
+        return JsonResponse({'error': 'Invalid vote type.'}, status=400)
+
+    try:
+        result = await sync_to_async(toggle_vote)(pk, user, vote_type)
+    except Idea.DoesNotExist:
+        return JsonResponse({'error': 'Idea not found.'}, status=404)
+    return JsonResponse(result._asdict())
+
+
 @login_required
 @require_POST
 def add_comment(request, pk):
@@ -176,13 +274,42 @@ def add_comment(request, pk):
         parent_id = request.POST.get('parent_id')
         if parent_id:
             comment.parent_comment = get_object_or_404(Comment, pk=parent_id, idea=idea)
-        comment.save()
+        with transaction.atomic():
+            comment.save()
+            Idea.objects.filter(pk=idea.pk).update(comment_total=F('comment_total') + 1)
+            defer(comment_changes(idea.category_id, request.user.pk))
+            publish_comment(comment)
         messages.success(request, 'Comment added.')
     else:
         messages.error(request, 'Could not add comment. Please check the form.')
     return redirect('idea_detail', pk=pk)
 
 
+async def idea_events(request, pk):
+    """Server-sent events with the idea's new vote totals and comments.
+
+    The ASGI application normally serves these itself (see
+    ``ideas.live.EventStreamApplication``). Under WSGI this answers 204,
+    which tells EventSource not to reconnect: each open stream would hold a
+    worker thread.
+    """
+    if getattr(request, 'scope', None) is None:
+        return HttpResponse(status=204)
+    if not await sync_to_async(idea_exists)(pk):
+        raise Http404('No Idea matches the given query.')
+    try:
+        subscription = get_broker().subscribe(idea_channel(pk))
+    except TooManyStreams:
+        response = HttpResponse('Too many live streams.', status=503, content_type='text/plain')
+        response['Retry-After'] = '60'
+        return response
+    response = StreamingHttpResponse(stream(subscription), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Tell nginx not to buffer the stream.
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
 def register(request):
     if request.user.is_authenticated:
         return redirect('home')
@@ -199,19 +326,78 @@ def register(request):
     return render(request, 'ideas/register.html', {'form': form})
 
 
+@login_required
+def stats(request):
+    if not get_role(request).can_review:
+        messages.error(request, 'You do not have permission to view statistics.')
+        return redirect('home')
+
+    # Everything here comes from the rollup tables, so the page costs the
+    # same however many ideas, votes and comments exist.
+    name = category_names()
+    week_starts, category_weeks, week_totals = weekly_activity(STATS_WEEKS, name)
+    context = {
+        'week_starts': week_starts,
+        'category_weeks': category_weeks,
+        'week_totals': week_totals,
+        'status_choices': Idea.STATUS_CHOICES,
+        'status_breakdown': status_breakdown(name),
+        'top_days': STATS_TOP_USER_DAYS,
+        'top_commenters': top_users('comments', STATS_TOP_USER_DAYS),
+        'top_voters': top_users('votes', STATS_TOP_USER_DAYS),
+    }
+    return render(request, 'ideas/stats.html', context)
+
+
+@login_required
+def export_ideas(request):
+    if not get_role(request).can_review:
+        messages.error(request, 'You do not have permission to export ideas.')
+        return redirect('home')
+
+    export_format = 'json' if request.GET.get('format') == 'json' else 'csv'
+    ideas = export_queryset(
+        category=request.GET.get('category'),
+        status=request.GET.get('status'),
+        query=request.GET.get('q'),
+    )
+    response = StreamingHttpResponse(
+        stream_export(ideas, export_format), content_type=CONTENT_TYPES[export_format]
+    )
+    response['Content-Disposition'] = f'attachment; filename="ideas.{export_format}"'
+    return response
+
+
 @login_required
 @require_POST
 def update_idea_status(request, pk):
-    if not user_can_review(request.user):
+    if not get_role(request).can_review:
         messages.error(request, 'You do not have permission to update idea status.')
         return redirect('home')
 
     idea = get_object_or_404(Idea, pk=pk)
     form = IdeaStatusForm(request.POST, instance=idea)
     if form.is_valid():
-        form.save()
+        Idea.objects.filter(pk=idea.pk).set_status(idea.status, changed_by=request.user)
         messages.success(request, f'Idea status updated to {idea.get_status_display()}.')
     else:
         messages.error(request, 'Could not update status. Please try again.')
-    next_url = request.POST.get('next') or 'review_dashboard'
-    return redirect(next_url)
+    return redirect_back(request, 'review_dashboard')
+
+
+@login_required
+@require_POST
+def bulk_update_idea_status(request):
+    if not get_role(request).can_review:
+        messages.error(request, 'You do not have permission to update idea status.')
+        return redirect('home')
+
+    form = BulkIdeaStatusForm(request.POST)
+    if form.is_valid():
+        status = form.cleaned_data['status']
+        changed = form.cleaned_data['ideas'].set_status(status, changed_by=request.user)
+        label = dict(Idea.STATUS_CHOICES)[status]
+        messages.success(request, f'{changed} idea{pluralize(changed)} updated to {label}.')
+    else:
+        messages.error(request, 'Select at least one idea and a status.')
+    return redirect_back(request, 'review_dashboard')
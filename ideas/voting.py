@@ -0,0 +1,121 @@
+from collections import namedtuple
+
+from django.db import IntegrityError, connections, router, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .cache import bump_feed_generation
+from .live import publish_votes
+from .models import Idea, Vote, hot_weight
+from .rollups import apply, vote_changes
+
+VoteResult = namedtuple('VoteResult', ['vote_type', 'removed', 'upvotes', 'downvotes', 'score'])
+
+# Backends that support INSERT ... ON CONFLICT and UPDATE ... RETURNING.
+UPSERT_VENDORS = {'postgresql', 'sqlite'}
+
+INSERT_SQL = (
+    'INSERT INTO ideas_vote (idea_id, user_id, vote_type, voted_at) VALUES (%s, %s, %s, %s) '
+    'ON CONFLICT (idea_id, user_id) DO NOTHING'
+)
+DELETE_SQL = 'DELETE FROM ideas_vote WHERE idea_id = %s AND user_id = %s AND vote_type = %s'
+FLIP_SQL = (
+    'UPDATE ideas_vote SET vote_type = %s WHERE idea_id = %s AND user_id = %s AND vote_type <> %s'
+)
+COUNTERS_SQL = (
+    'UPDATE ideas_idea SET upvotes = upvotes + %s, downvotes = downvotes + %s, '
+    'score = score + %s, updated_at = %s WHERE id = %s '
+    'RETURNING upvotes, downvotes, score, category_id'
+)
+COUNTER_COLUMNS = ('upvotes', 'downvotes', 'score')
+
+
+def toggle_vote(idea_id, user, vote_type, using=None):
+    """Record ``user``'s click on ``vote_type`` and return the idea's new totals.
+
+    Clicking the current vote again removes it; clicking the other one flips
+    it. ``vote_type`` in the result is the user's vote afterwards, or None.
+    Raises ``Idea.DoesNotExist`` for an unknown idea.
+
+    Each statement that decides what the click does also does it, so
+    concurrent clicks can neither both insert a vote nor both remove it.
+    """
+    using = using or router.db_for_write(Vote)
+    connection = connections[using]
+    with transaction.atomic(using=using):
+        if connection.vendor in UPSERT_VENDORS:
+            previous = _record_vote_upsert(connection, idea_id, user.pk, vote_type)
+        else:
+            previous = _record_vote_locked(using, idea_id, user.pk, vote_type)
+        added = None if previous == vote_type else vote_type
+        totals = _apply_counters(connection, idea_id, previous, added)
+        category_id = totals.pop('category_id')
+        _apply_hot_score(using, idea_id, totals['score'], previous, added)
+        apply(vote_changes(category_id, user.pk, previous, added), using)
+        # The raw statements bypass the Vote signals that normally do this.
+        bump_feed_generation()
+        publish_votes(idea_id, using=using, **totals)
+    return VoteResult(added, added is None, **totals)
+
+
+def _record_vote_upsert(connection, idea_id, user_id, vote_type):
+    """Apply the click with conditional writes and return the previous vote type."""
+    other = next(choice for choice in Vote.COUNTER_FIELDS if choice != vote_type)
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    with connection.cursor() as cursor:
+        # A concurrent request can delete or change the vote between two of
+        # these statements so that all three miss; go round again.
+        while True:
+            try:
+                cursor.execute(INSERT_SQL, [idea_id, user_id, vote_type, now])
+            except IntegrityError as exc:  # unknown idea, on PostgreSQL
+                raise Idea.DoesNotExist('Idea matching query does not exist.') from exc
+            if cursor.rowcount == 1:
+                return None
+            cursor.execute(DELETE_SQL, [idea_id, user_id, vote_type])
+            if cursor.rowcount == 1:
+                return vote_type
+            cursor.execute(FLIP_SQL, [vote_type, idea_id, user_id, vote_type])
+            if cursor.rowcount == 1:
+                return other
+
+
+def _record_vote_locked(using, idea_id, user_id, vote_type):
+    """Fallback for other backends: serialize votes on the idea with a row lock."""
+    Idea.objects.using(using).select_for_update().only('pk').get(pk=idea_id)
+    votes = Vote.objects.using(using).filter(idea_id=idea_id, user_id=user_id)
+    previous = votes.values_list('vote_type', flat=True).first()
+    if previous is None:
+        votes.create(idea_id=idea_id, user_id=user_id, vote_type=vote_type)
+    elif previous == vote_type:
+        votes.delete()
+    else:
+        votes.update(vote_type=vote_type)
+    return previous
+
+
+def _apply_counters(connection, idea_id, removed, added):
+    """Move the idea's counters and return their new values and the idea's category."""
+    now = timezone.now()
+    if connection.vendor not in UPSERT_VENDORS:
+        ideas = Idea.objects.using(connection.alias).filter(pk=idea_id)
+        ideas.update(updated_at=now, **Idea.vote_counter_updates(removed, added))
+        return ideas.values(*COUNTER_COLUMNS, 'category_id').get()
+
+    deltas = Idea.vote_counter_deltas(removed, added)
+    params = [deltas.get(column, 0) for column in COUNTER_COLUMNS]
+    params += [connection.ops.adapt_datetimefield_value(now), idea_id]
+    with connection.cursor() as cursor:
+        cursor.execute(COUNTERS_SQL, params)
+        row = cursor.fetchone()
+    if row is None:
+        raise Idea.DoesNotExist('Idea matching query does not exist.')
+    return dict(zip((*COUNTER_COLUMNS, 'category_id'), row))
+
+
+def _apply_hot_score(using, idea_id, score, removed, added):
+    """Move ``hot_score`` by the change in its score term; the time term is fixed."""
+    old_score = score - Idea.vote_counter_deltas(removed, added).get('score', 0)
+    change = hot_weight(score) - hot_weight(old_score)
+    if change:
+        Idea.objects.using(using).filter(pk=idea_id).update(hot_score=F('hot_score') + change)
@@ -2,6 +2,8 @@
 ASGI config for innovation_project project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Serve it with an ASGI server (``uvicorn innovation_project.asgi:application``)
+for the live update streams of ``ideas.live``; under WSGI they are refused.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -13,4 +15,8 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'innovation_project.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from ideas.live import EventStreamApplication  # noqa: E402 (needs the app registry)
+
+application = EventStreamApplication(django_application)
@@ -10,11 +10,21 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
+import sys
 from pathlib import Path
 
+from dotenv import load_dotenv
+
+from .database import database_from_url
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Settings below read the environment; a .env file in BASE_DIR fills it in
+# locally without overriding variables that are already set.
+load_dotenv(BASE_DIR / '.env')
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
@@ -23,7 +33,8 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = 'django-insecure-^pk8u!rrj8t!$ec0v#uma9^-7q^oaxu(#d7iy75dh-l79o!@^4'
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+# Set DJANGO_DEBUG=false there; static URLs are only fingerprinted without debug.
+DEBUG = os.environ.get('DJANGO_DEBUG', 'true').lower() in ('1', 'true', 'yes')
 
 ALLOWED_HOSTS = [
     "localhost",
@@ -39,13 +50,20 @@ INSTALLED_APPS = [
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.messages',
+    # runserver serves static files through WhiteNoise too, as in production.
+    'whitenoise.runserver_nostatic',
     'django.contrib.staticfiles',
     'django.contrib.humanize',
     'ideas',
 ]
 
 MIDDLEWARE = [
+    'ideas.middleware.QueryMetricsMiddleware',
+    'ideas.middleware.PrimaryPinningMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'whitenoise.middleware.WhiteNoiseMiddleware',
+    # Brotli or gzip for pages; WhiteNoise above serves static files precompressed.
+    'ideas.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -60,7 +78,6 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.request',
@@ -68,6 +85,17 @@ TEMPLATES = [
                 'django.contrib.messages.context_processors.messages',
                 'ideas.context_processors.role_flags',
             ],
+            # Parse each template once per process; runserver's autoreloader
+            # empties the cache when a template changes.
+            'loaders': [
+                (
+                    'django.template.loaders.cached.Loader',
+                    [
+                        'django.template.loaders.filesystem.Loader',
+                        'django.template.loaders.app_directories.Loader',
+                    ],
+                ),
+            ],
         },
     },
 ]
@@ -78,13 +106,78 @@ WSGI_APPLICATION = 'innovation_project.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+#
+# DATABASE_URL selects the database (see innovation_project/database.py);
+# without it the project's db.sqlite3 is used. Connections are kept for
+# DB_CONN_MAX_AGE seconds, or pooled when DB_POOL_SIZE is set (PostgreSQL
+# with psycopg[pool] only).
+
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': database_from_url(
+        os.environ.get('DATABASE_URL', 'sqlite:///db.sqlite3'),
+        BASE_DIR,
+        conn_max_age=int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        pool_size=int(os.environ.get('DB_POOL_SIZE', 0)),
+    )
 }
 
+# Read replicas: DATABASE_REPLICA_URLS is a comma-separated list of URLs in
+# the DATABASE_URL format. Reads are spread over them by
+# ideas.routers.PrimaryReplicaRouter; a user's reads stay on the primary for
+# IDEAS_PRIMARY_PIN_SECONDS after each write so they see their own changes.
+# Locally a copy of an SQLite file refreshed with `manage.py sync_replicas`
+# can stand in for a replica.
+
+IDEAS_READ_REPLICAS = []
+for n, url in enumerate(filter(None, os.environ.get('DATABASE_REPLICA_URLS', '').split(',')), 1):
+    DATABASES[f'replica{n}'] = database_from_url(
+        url.strip(),
+        BASE_DIR,
+        conn_max_age=int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        pool_size=int(os.environ.get('DB_POOL_SIZE', 0)),
+    )
+    DATABASES[f'replica{n}']['TEST'] = {'MIRROR': 'default'}
+    IDEAS_READ_REPLICAS.append(f'replica{n}')
+
+DATABASE_ROUTERS = ['ideas.routers.PrimaryReplicaRouter']
+IDEAS_PRIMARY_PIN_SECONDS = 10
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+#
+# Local memory by default; set REDIS_URL (any Redis-compatible server) or
+# CACHE_DIR (file-based, shared by workers on one host) in production.
+
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+elif os.environ.get('CACHE_DIR'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ['CACHE_DIR'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'innovation-tracker',
+        }
+    }
+
+# Seconds an anonymous page stays cached; any write invalidates it sooner.
+IDEAS_PAGE_CACHE_TIMEOUT = 300
+# Seconds a session reuses the role it read (ideas.roles). A role change
+# reaches other sessions at once through the cache, but a per-process cache
+# only tells its own worker; elsewhere it applies after this long.
+IDEAS_ROLE_MAX_AGE = 60
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -124,6 +217,78 @@ STATIC_URL = 'static/'
 STATICFILES_DIRS = [BASE_DIR / 'static']
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
+# Test runs render pages without running collectstatic first.
+TESTING = sys.argv[1:2] == ['test']
+
+# collectstatic writes fingerprinted copies (e.g. site.3f2a1b.css) plus gzip
+# and brotli versions of each; WhiteNoise serves those with a ten-year,
+# immutable Cache-Control, so repeat visits fetch no assets at all.
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {
+        'BACKEND': (
+            'django.contrib.staticfiles.storage.StaticFilesStorage'
+            if TESTING
+            else 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+        ),
+    },
+}
+if TESTING:
+    # Serve from the source directories, as runserver does.
+    WHITENOISE_AUTOREFRESH = WHITENOISE_USE_FINDERS = True
+
+# Per-request query metrics (ideas.middleware.QueryMetricsMiddleware).
+IDEAS_SERVER_TIMING = True
+# Log a request at WARNING when one query shape repeats this many times.
+IDEAS_DUPLICATE_QUERY_WARNING = 5
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'ideas.performance': {
+            'handlers': ['console'],
+            # Set to INFO to log query counts and timings for every request.
+            'level': os.environ.get('IDEAS_PERFORMANCE_LOG_LEVEL', 'WARNING'),
+            'propagate': False,
+        },
+    },
+}
+
+# Live vote and comment updates on idea pages (ideas.live), streamed as
+# server-sent events by the ASGI application. LocalBroker only reaches
+# streams in the same process; with several workers, set REDIS_URL so they
+# share events through Redis.
+IDEAS_LIVE_REDIS_URL = os.environ.get('REDIS_URL')
+IDEAS_LIVE_BROKER = 'ideas.live.RedisBroker' if IDEAS_LIVE_REDIS_URL else 'ideas.live.LocalBroker'
+# Event streams one process serves at once; more are refused with 503.
+IDEAS_LIVE_MAX_STREAMS = 5000
+# Unsent events kept per stream before the oldest are dropped.
+IDEAS_LIVE_QUEUE_SIZE = 20
+# Seconds between keepalives on an idle stream.
+IDEAS_LIVE_HEARTBEAT = 25
+
+# Background tasks (ideas.tasks), run by `manage.py run_tasks`.
+# Tasks claimed per round; tasks of one batched kind run as one unit.
+IDEAS_TASK_BATCH_SIZE = 200
+# Seconds a worker holds its claim; a task still running then may run again.
+IDEAS_TASK_LEASE = 300
+# Attempts before a task is marked failed, and the first retry delay in
+# seconds (doubled after each failure).
+IDEAS_TASK_MAX_ATTEMPTS = 5
+IDEAS_TASK_RETRY_DELAY = 10
+
+# Number of ideas per page on the feed, My Ideas and the review dashboard.
+IDEAS_PAGE_SIZE = 20
+# Top-level comment threads shown per page on the idea detail page.
+IDEAS_COMMENT_THREADS_PER_PAGE = 50
+# Admin changelists count at most this many rows; unfiltered lists of larger
+# tables show an estimate instead.
+IDEAS_ADMIN_COUNT_LIMIT = 10_000
+
 LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = 'home'
 LOGOUT_REDIRECT_URL = 'login'
@@ -0,0 +1,40 @@
+// Live updates on the idea page: listens to the idea's event stream and
+// updates its vote counts in place. New comments aren't inserted (their
+// reply forms need a CSRF token and thread position); a notice offers to
+// reload instead.
+(function () {
+  "use strict";
+
+  var root = document.querySelector("[data-events-url]");
+  if (!root || !window.EventSource) return;
+
+  var ideaId = root.dataset.ideaId;
+  var notice = root.querySelector("[data-live-notice]");
+  var newComments = 0;
+
+  function showNotice(text) {
+    if (!notice) return;
+    notice.querySelector("[data-live-text]").textContent = text;
+    notice.classList.remove("d-none");
+  }
+
+  var source = new EventSource(root.dataset.eventsUrl);
+
+  source.addEventListener("votes", function (event) {
+    var totals = JSON.parse(event.data);
+    document
+      .querySelectorAll('[data-vote-count][data-idea-id="' + ideaId + '"]')
+      .forEach(function (el) {
+        if (el.dataset.voteCount in totals) el.textContent = totals[el.dataset.voteCount];
+      });
+  });
+
+  source.addEventListener("comment", function () {
+    newComments += 1;
+    showNotice(newComments === 1 ? "1 new comment." : newComments + " new comments.");
+  });
+
+  source.addEventListener("missed", function () {
+    showNotice("This page has missed some updates.");
+  });
+})();
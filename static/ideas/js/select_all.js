@@ -0,0 +1,16 @@
+// A checkbox marked data-select-all="name" checks or clears every checkbox
+// with that name, e.g. to select a whole page of ideas for a bulk action.
+(function () {
+  "use strict";
+
+  document.querySelectorAll("[data-select-all]").forEach(function (toggle) {
+    var boxes = function () {
+      return document.querySelectorAll('input[type="checkbox"][name="' + toggle.dataset.selectAll + '"]');
+    };
+    toggle.addEventListener("change", function () {
+      boxes().forEach(function (box) {
+        box.checked = toggle.checked;
+      });
+    });
+  });
+})();
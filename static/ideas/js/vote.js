@@ -0,0 +1,113 @@
+// In-page voting: buttons marked with data-vote-type post to the JSON vote
+// API and update every count shown for that idea without reloading.
+// Counts change optimistically on click and are replaced by the server's
+// totals (or restored) once the request finishes.
+(function () {
+  "use strict";
+
+  function csrfToken() {
+    var meta = document.querySelector('meta[name="csrf-token"]');
+    return meta ? meta.content : "";
+  }
+
+  function counters(ideaId) {
+    var found = {};
+    document
+      .querySelectorAll('[data-vote-count][data-idea-id="' + ideaId + '"]')
+      .forEach(function (el) {
+        (found[el.dataset.voteCount] = found[el.dataset.voteCount] || []).push(el);
+      });
+    return found;
+  }
+
+  function buttons(ideaId) {
+    return document.querySelectorAll('[data-vote-type][data-idea-id="' + ideaId + '"]');
+  }
+
+  function read(ideaId) {
+    var state = { vote_type: null };
+    buttons(ideaId).forEach(function (button) {
+      if (button.classList.contains("active")) state.vote_type = button.dataset.voteType;
+    });
+    var found = counters(ideaId);
+    ["upvotes", "downvotes", "score"].forEach(function (field) {
+      state[field] = found[field] ? parseInt(found[field][0].textContent, 10) || 0 : 0;
+    });
+    return state;
+  }
+
+  function show(ideaId, state) {
+    var found = counters(ideaId);
+    ["upvotes", "downvotes", "score"].forEach(function (field) {
+      (found[field] || []).forEach(function (el) {
+        el.textContent = state[field];
+      });
+    });
+    buttons(ideaId).forEach(function (button) {
+      button.classList.toggle("active", button.dataset.voteType === state.vote_type);
+    });
+  }
+
+  function predict(state, voteType) {
+    var next = Object.assign({}, state);
+    var field = { upvote: "upvotes", downvote: "downvotes" };
+    var weight = { upvote: 1, downvote: -1 };
+    if (state.vote_type) {
+      next[field[state.vote_type]] -= 1;
+      next.score -= weight[state.vote_type];
+    }
+    if (state.vote_type === voteType) {
+      next.vote_type = null;
+    } else {
+      next[field[voteType]] += 1;
+      next.score += weight[voteType];
+      next.vote_type = voteType;
+    }
+    return next;
+  }
+
+  // Cached feed cards don't know the viewer; the page lists their votes.
+  var userVotes = document.getElementById("ideas-user-votes");
+  if (userVotes) {
+    var votes = JSON.parse(userVotes.textContent);
+    Object.keys(votes).forEach(function (ideaId) {
+      buttons(ideaId).forEach(function (button) {
+        button.classList.toggle("active", button.dataset.voteType === votes[ideaId]);
+      });
+    });
+  }
+
+  document.addEventListener("click", function (event) {
+    var button = event.target.closest("[data-vote-type][data-vote-url]");
+    if (!button || !window.fetch) return;
+    event.preventDefault();
+    if (button.disabled) return;
+
+    var ideaId = button.dataset.ideaId;
+    var previous = read(ideaId);
+    var group = buttons(ideaId);
+    group.forEach(function (b) { b.disabled = true; });
+    show(ideaId, predict(previous, button.dataset.voteType));
+
+    var body = new URLSearchParams({ vote_type: button.dataset.voteType });
+    fetch(button.dataset.voteUrl, {
+      method: "POST",
+      body: body,
+      credentials: "same-origin",
+      headers: { "X-CSRFToken": csrfToken(), Accept: "application/json" },
+    })
+      .then(function (response) {
+        if (!response.ok) throw new Error(response.status);
+        return response.json();
+      })
+      .then(function (result) {
+        show(ideaId, result);
+      })
+      .catch(function () {
+        show(ideaId, previous);
+      })
+      .finally(function () {
+        group.forEach(function (b) { b.disabled = false; });
+      });
+  });
+})();